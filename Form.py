@@ -3,16 +3,39 @@ import numpy as np
 import os
 import string
 import Levenshtein
+from rapidfuzz import process as rf_process
+from rapidfuzz.distance import Levenshtein as rf_levenshtein
 import re
-import nltk
-from collections import OrderedDict
-nltk.download('punkt_tab')
-#nltk.download('punkt')
-nltk.download('stopwords')
-
-import skrub
-
-stop_words = set(nltk.corpus.stopwords.words('english'))
+import json
+import shutil
+import hashlib
+import tempfile
+import zipfile
+import io
+import sys
+from collections import OrderedDict, Counter
+import XPathExpression as xpath
+
+__version__ = "1.1.0"
+
+# Format of the parsed forms stored by Form.load, part of the cache key. Increase it whenever the
+# cached frames (survey, choices, settings, questions, groups, ...) or their derivation change
+cache_format = 2
+
+# English stop words, as distributed with the NLTK stopwords corpus, bundled so that
+# no corpus download is needed at import time
+stop_words = set("""
+a about above after again against ain all am an and any are aren aren't as at be because been before being
+below between both but by can couldn couldn't d did didn didn't do does doesn doesn't doing don don't down
+during each few for from further had hadn hadn't has hasn hasn't have haven haven't having he he'd he'll her
+here hers herself he's him himself his how i i'd if i'll i'm in into is isn isn't it it'd it'll it's its itself
+i've just ll m ma me mightn mightn't more most mustn mustn't my myself needn needn't no nor not now o of off on
+once only or other our ours ourselves out over own re s same shan shan't she she'd she'll she's should shouldn
+shouldn't should've so some such t than that that'll the their theirs them themselves then there these they
+they'd they'll they're they've this those through to too under until up ve very was wasn wasn't we we'd we'll
+we're were weren weren't we've what when where which while who whom why will with won won't wouldn wouldn't y
+you you'd you'll your you're yours yourself yourselves you've
+""".split())
 stop_words.add("please")
 stop_words.add("specify")
 stop_words.discard("where")
@@ -20,18 +43,60 @@ stop_words.discard("how")
 stop_words.discard("when")
 stop_words.discard("why")
 
-def find_common_words(df, lbl_col):
-    full_text = ""
-    df = df[df[lbl_col].notnull()]
-    for index, row in df.iterrows():
-        full_text = full_text + " " + row[lbl_col]
-    allWords = nltk.tokenize.word_tokenize(full_text)
-    allWordDist = nltk.FreqDist(w.lower() for w in allWords)
-    mostCommon= allWordDist.most_common(10)
-    common_words = []
-    for item in mostCommon:
-        common_words.append(item[0])
-    return common_words
+# Regular expression approximating the NLTK Treebank word tokenizer (contractions,
+# hyphenated or slashed words and decimal numbers are kept together, punctuation is split off)
+_token_re = re.compile(r"\w+(?=n't\b)|n't\b|'(?:s|re|ve|ll|d|m)\b|\w+(?:[-./]\w+)*/?|\.\.\.|[^\w\s]", re.IGNORECASE)
+_word_tokenizer = None
+
+def word_tokenize(text):
+
+    """Split a text into words.
+
+    NLTK's word_tokenize is used when nltk and its punkt_tab tokenizer data are installed locally.
+    Otherwise, e.g. on offline machines, a built-in regular expression tokenizer is used. Nothing
+    is downloaded and nltk is only imported on the first call."""
+
+    global _word_tokenizer
+    if _word_tokenizer is None:
+        try:
+            import nltk
+            nltk.data.find("tokenizers/punkt_tab/english/")
+            _word_tokenizer = nltk.tokenize.word_tokenize
+        except (ImportError, LookupError):
+            _word_tokenizer = _token_re.findall
+    return _word_tokenizer(text)
+
+def object_memory_usage(obj):
+
+    """Return the approximate memory used by a Python object and the lists, tuples, sets and dicts it holds, in bytes."""
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(object_memory_usage(key) + object_memory_usage(value) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(object_memory_usage(item) for item in obj)
+    return size
+
+def find_common_words(df, lbl_col, k = 10):
+
+    """Return the k most common words (in lower case) of a label column.
+
+    Labels are tokenized one by one and counted in a single Counter, so the cost is
+    linear in the label volume."""
+
+    allWordDist = Counter()
+    for label in df[lbl_col].dropna():
+        allWordDist.update(w.lower() for w in word_tokenize(str(label)))
+    return [item[0] for item in allWordDist.most_common(k)]
+
+def find_common_words_by_language(df, k = 10):
+
+    """Return the k most common words of every label column ("label" and "label::<language>").
+
+    The result is a dictionary mapping each label column to its list of common words."""
+
+    lbl_cols = [col for col in df.columns if col == "label" or str(col).startswith("label::")]
+    return {col: find_common_words(df, col, k) for col in lbl_cols}
 
 def remove_common_words(df,
                         lbl_col,
@@ -39,7 +104,7 @@ def remove_common_words(df,
 
     for index, row in df.iterrows():
         sentence = row[lbl_col]
-        word_tokens = nltk.tokenize.word_tokenize(sentence)
+        word_tokens = word_tokenize(sentence)
         filtered_sentence = " "
         for w in word_tokens:
             if w not in common_words:
@@ -59,13 +124,174 @@ def process_label(s):
         #s = "".join([char.lower() for char in s if char not in string.punctuation]).strip()
         s = s.lower().replace(".", "").replace("?", "").replace("'", "").strip()
         # Remove stop words
-        word_tokens = nltk.tokenize.word_tokenize(s)
+        word_tokens = word_tokenize(s)
         out = " ".join([w for w in word_tokens if not w in stop_words])
     except:
         out = s
 
     return out
 
+def char_ngrams(s, n = 3):
+
+    """Return the set of character n-grams of a string, padded with spaces so that short strings also have n-grams."""
+
+    s = " " + s + " "
+    return {s[i:i + n] for i in range(max(len(s) - n + 1, 1))}
+
+def typed_text(values):
+
+    """Return the values as "<type>:<value>" texts, so that hashes of the texts tell 1 from "1".
+
+    Integral floats are typed as int, as pandas reads integer columns with empty cells as floats, and
+    empty values (NaN, None, pd.NA) all give the same empty text."""
+
+    out = np.empty(len(values), dtype = object)
+    for i, v in enumerate(values):
+        if isinstance(v, np.generic):
+            v = v.item()
+        if isinstance(v, float) and v.is_integer():
+            v = int(v)
+        out[i] = "" if pd.isna(v) else "{}:{}".format(type(v).__name__, v)
+    return out
+
+def read_sheets(in_xlsx, sheet_names, engine = None):
+
+    """Read several sheets of a workbook in a single pass.
+
+    The workbook is opened once, so the zip archive and the shared-strings table are
+    only parsed once for all sheets. Sheets missing from the workbook are returned as None.
+
+    in_xlsx (string): The path to the workbook.
+    sheet_names (list): The names of the sheets to read.
+    engine (string): The pandas Excel engine to use, e.g. "openpyxl" (default, read-only mode)
+        or "calamine" (faster, requires the python-calamine package)."""
+
+    with pd.ExcelFile(in_xlsx, engine = engine) as xls:
+        available = set(xls.sheet_names)
+        return {name: xls.parse(sheet_name = name) if name in available else None for name in sheet_names}
+
+# Strings read as missing values by pandas.read_excel
+na_strings = {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+              "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"}
+
+def iter_sheet_chunks(in_xlsx, sheet_name, chunksize = 10000):
+
+    """Yield a sheet of a workbook as DataFrames of at most chunksize rows.
+
+    Rows are streamed with openpyxl's read-only mode, so the sheet is never held in memory as a whole.
+    As with pandas, integral float cells are returned as int, and empty cells and missing-value strings
+    such as "NA" or "None" as missing values (None). Nothing is yielded when the sheet does not exist."""
+
+    import openpyxl
+
+    wb = openpyxl.load_workbook(in_xlsx, read_only = True, data_only = True)
+    try:
+        if sheet_name not in wb.sheetnames:
+            return
+        rows = wb[sheet_name].iter_rows(values_only = True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [f"Unnamed: {i}" if col is None else col for i, col in enumerate(header)]
+        width = len(columns)
+
+        chunk = []
+        for row in rows:
+            row = [int(v) if isinstance(v, float) and v.is_integer() else
+                   None if isinstance(v, str) and v in na_strings else v for v in row[:width]]
+            chunk.append(row + [None] * (width - len(row)))
+            if len(chunk) == chunksize:
+                yield pd.DataFrame(chunk, columns = columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns = columns)
+    finally:
+        wb.close()
+
+def iter_choices_chunks(in_xlsx, chunksize = 10000):
+
+    """Yield the choices sheet of a workbook in chunks of at most chunksize rows (see iter_sheet_chunks).
+
+    As in Form, a "list name" column is renamed "list_name" and rows without list name are dropped."""
+
+    for chunk in iter_sheet_chunks(in_xlsx, "choices", chunksize):
+        if "list name" in chunk.columns and "list_name" not in chunk.columns:
+            chunk = chunk.rename(columns = {"list name": "list_name"})
+        yield chunk[chunk["list_name"].notnull()]
+
+def file_sha256(in_file, chunk_size = 1 << 20):
+
+    """Return the SHA-256 hex digest of a file's content."""
+
+    sha = hashlib.sha256()
+    with open(in_file, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def write_frame(df, path_stem):
+
+    """Write a DataFrame to disk in a columnar format and return the file name used.
+
+    Parquet is used when pyarrow is installed and the frame round-trips exactly, i.e. all column labels
+    are strings and all object columns only hold strings or nulls. Other frames (e.g. mixed int/str choice
+    names, or a column label read as a number) are pickled."""
+
+    try:
+        import pyarrow  # noqa: F401
+        arrow_safe = all(isinstance(col, str) for col in df.columns) and all(
+            df[col].map(lambda v: isinstance(v, str) or pd.isna(v)).all()
+            for col in df.columns if df[col].dtype == object)
+    except ImportError:
+        arrow_safe = False
+
+    if arrow_safe:
+        df.to_parquet(path_stem + ".parquet")
+        return os.path.basename(path_stem) + ".parquet"
+    df.to_pickle(path_stem + ".pkl")
+    return os.path.basename(path_stem) + ".pkl"
+
+def read_frame(path):
+
+    """Read a DataFrame written by write_frame."""
+
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+        # Parquet returns None for missing strings where read_excel gives NaN
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].where(df[col].notnull(), np.nan)
+        return df
+    return pd.read_pickle(path)
+
+def compact_frame(df, categorical_columns, text_columns, max_unique_ratio = 0.5):
+
+    """Return a copy of a DataFrame with compact column types.
+
+    Object columns listed in categorical_columns become categoricals when they have few distinct values
+    (at most max_unique_ratio of the rows). Object columns whose name (before any "::<language>" suffix)
+    is in text_columns become Arrow-backed strings when pyarrow is installed. Columns holding anything
+    else than strings and nulls (e.g. numeric choice names) are left untouched, so values never change."""
+
+    try:
+        import pyarrow  # noqa: F401
+        string_dtype = pd.StringDtype("pyarrow")
+    except ImportError:
+        string_dtype = None
+
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        values = df[col].dropna()
+        if not values.map(lambda v: isinstance(v, str)).all():
+            continue
+        if col in categorical_columns and values.nunique() <= max_unique_ratio * len(df):
+            df[col] = df[col].astype("category")
+        elif string_dtype is not None and str(col).split("::")[0] in text_columns:
+            df[col] = df[col].astype(string_dtype)
+    return df
+
 """The Form class is a Python class designed to represent and manipulate information related to XLSForm surveys.
 XLSForm is a standard format for authoring surveys in a spreadsheet format, often used in conjunction with data collection tools like ODK."""
 
@@ -74,7 +300,13 @@ class Form:
     # Constructor
     """The constructor initializes a new Form object with the provided parameters.
 
-    in_xlsx (string): The path to the XLSForm spreadsheet file from which the survey information is read.
+    in_xlsx (string or file-like): The path to the XLSForm spreadsheet file from which the survey information is read,
+        or a binary file-like object holding it (see also from_buffer, from_bytes and from_zip).
+    engine (string): The pandas Excel engine used to read the workbook, e.g. "openpyxl" (default) or "calamine".
+    compact (bool): If True, store low-cardinality columns as categoricals and texts as Arrow-backed strings (see compact()).
+    choices_chunksize (int): If set, the choices sheet is not loaded. It is only scanned in chunks of this many rows for
+        its columns and list names, and the choices are compared with streamCompareChoices (files only).
+    name (string): The file name reported for the form, by default the base name of in_xlsx.
     survey_type (string): A string representing the survey type, which is passed as an argument to the constructor.
     
     Inside the constructor, the provided XLSForm file is read, and relevant survey information is extracted and stored as instance variables:
@@ -84,17 +316,39 @@ class Form:
     _version (tuple): The version information extracted from the XLSForm.
     _default_language (tuple): The default language information extracted from the XLSForm.
     
+    The group structure, the questions and the common words are derived from the survey sheet on first access
+    of the groups, group_od, questions and common_words properties.
+    
     It is important to ensure that the Form objects are properly initialized with the required survey information before using these comparison methods."""
     def __init__(self,
-                 in_xlsx):
+                 in_xlsx,
+                 engine = None,
+                 compact = False,
+                 name = None,
+                 choices_chunksize = None):
+
+        if hasattr(in_xlsx, "read"):
+            if choices_chunksize:
+                raise ValueError("Only forms read from a file can stream their choices sheet")
+            # In-memory upload or open file: read directly, without a temporary file
+            self._source = None
+            name = name or getattr(in_xlsx, "name", None) or "buffer.xlsx"
+        else:
+            if not os.path.exists(in_xlsx) or not in_xlsx.endswith('.xlsx'):
+                raise FileNotFoundError(f"File {in_xlsx} not found. Cannot create Form object.")
+            self._source = in_xlsx
+            name = name or in_xlsx
+        self._file_name = os.path.basename(str(name))
 
-        if not os.path.exists(in_xlsx) or not in_xlsx.endswith('.xlsx'):
-            raise FileNotFoundError(f"File {in_xlsx} not found. Cannot create Form object.")
+        print(f"📝 Create Form object from {self._file_name}")
 
-        print(f"📝 Create Form object from {os.path.basename(in_xlsx)}")
+        # Open the workbook once and parse all XLSForm sheets in a single pass
+        sheet_names = ["survey", "settings", "entities"] if choices_chunksize else ["survey", "choices", "settings", "entities"]
+        sheets = read_sheets(in_xlsx, sheet_names, engine = engine)
 
-        try:
-            self._survey_df = pd.read_excel(in_xlsx, sheet_name="survey").reset_index()
+        self._survey_df = sheets["survey"]
+        if self._survey_df is not None:
+            self._survey_df = self._survey_df.reset_index()
             self._survey_df = self._survey_df[self._survey_df["type"].notnull()]
             dims = self._survey_df.shape
             self._survey_lang_columns = [
@@ -103,34 +357,59 @@ class Form:
                 "constraint_message", "required_message",
                 "image", "audio", "video"]
             print("\t - ℹ️ survey sheet with " + str(dims[1]) + " columns and " + str(dims[0]) + " rows")
-        except ValueError:
-            self._survey_df = None
+        else:
             print("\t - ⚠️ Sheet 'survey' not found in the file")
-        try:
-            choices_df  = pd.read_excel(in_xlsx, sheet_name="choices")
-            if "list name" in choices_df.columns and "list_name" not in choices_df.columns:
-                choices_df = choices_df.rename(columns={"list name": "list_name"})
-            self._choices_df = choices_df[choices_df["list_name"].notnull()]
-            dims = self._choices_df.shape 
-            print("\t - ℹ️ choices sheet with " + str(dims[1]) + " columns and " + str(dims[0]) + " rows")
-        except:
+        if choices_chunksize:
             self._choices_df = None
-            print("\t - ℹ️ no choices sheet found")
-        try:
-            self._settings_df = pd.read_excel(in_xlsx, sheet_name="settings")
+            self._list_names, self._choices_columns, rows = Form.scanChoices(in_xlsx, choices_chunksize)
+            print("\t - ℹ️ choices sheet with " + str(len(self._choices_columns)) + " columns and " + str(rows) + " rows, streamed")
+        else:
+            try:
+                choices_df  = sheets["choices"]
+                if "list name" in choices_df.columns and "list_name" not in choices_df.columns:
+                    choices_df = choices_df.rename(columns={"list name": "list_name"})
+                self._choices_df = choices_df[choices_df["list_name"].notnull()]
+                dims = self._choices_df.shape
+                print("\t - ℹ️ choices sheet with " + str(dims[1]) + " columns and " + str(dims[0]) + " rows")
+            except:
+                self._choices_df = None
+                self._list_names, self._choices_columns = [], []
+                print("\t - ℹ️ no choices sheet found")
+        self._settings_df = sheets["settings"]
+        if self._settings_df is not None:
             dims = self._settings_df.shape 
             print("\t - ℹ️ settings sheet with " + str(dims[1]) + " columns")
-        except:
-            self._settings_df = None
+        else:
             print("\t - ⚠️ no settings sheet found")
-        try:
-            self._entities_df = pd.read_excel(in_xlsx, sheet_name="entities")
+        self._entities_df = sheets["entities"]
+        if self._entities_df is not None:
             dims = self._entities_df.shape 
             print("\t - ℹ️ entities sheet with " + str(dims[1]) + " columns")
-        except:
-            self._entities_df = None
+        else:
             print("\t - ℹ️ no entities sheet found")
         
+        self._init_attributes()
+
+        # Derived structures are built on first access, so that settings-only or
+        # list-only checks do not pay for the survey walk and the tokenization
+        self._group_od = None
+        self._group_df = None
+        self._questions = None
+        self._notes = None
+        self._common_words = None
+        self._common_words_by_language = None
+        self._translations = None
+        self._label_index = None
+        self._sheet_digests = None
+
+        self._compact = False
+        if compact:
+            self.compact()
+
+    def _init_attributes(self):
+
+        """Extract the general form attributes from the loaded sheets."""
+
         # Extract general form attributes
 
         # Core form settings
@@ -151,8 +430,10 @@ class Form:
         # Behavior settings
         self._allow_choice_duplicates = self._settings_df.get("allow_choice_duplicates", [None])[0]
 
-        # Load choice list names
-        self._list_names = self._choices_df["list_name"].dropna().unique().tolist() 
+        # Load choice list names and columns (see scanChoices when the choices sheet is streamed)
+        if self._choices_df is not None:
+            self._list_names = self._choices_df["list_name"].dropna().unique().tolist()
+            self._choices_columns = self._choices_df.columns.tolist()
 
         # Load survey columns
         self._survey_columns = self._survey_df.columns.tolist()
@@ -163,44 +444,23 @@ class Form:
         # Load survey repeat names
         self._repeat_names = self._survey_df[self._survey_df["type"].isin(["begin repeat", "begin_repeat"])]["name"].tolist()
 
-        # Parse groups in an ordered dictionary
-        self._group_od = OrderedDict()
-        stack = []
-        current = self._group_od
-        # Initialize a list to hold questions with their group info
-        questions_with_group_info = []
-        # Iterate through the survey DataFrame to build the group structure and assign group to questions
-        for _, row in self._survey_df.iterrows():
-
-            if row["type"] in ["begin group", "begin_group", "begin repeat", "begin_repeat"]:
-                prefix = "repeat____" if "repeat" in row["type"] else "group____"
-                group_name = f"{prefix}{row['name']}"
-                # Create a new group and add it to the stack
-                new_group = OrderedDict()
-                current[group_name] = new_group
-                stack.append(current)
-                current = new_group
-            elif row["type"] in ["end group", "end_group", "end repeat", "end_repeat"]:
-                # Pop the group from the stack
-                current = stack.pop()
-            else:
-                # For all questions, assign the current group_id
-                row1 = row.copy()
-                row1["group_id"] = next(iter(stack[-1].keys())).split("____", 1)[1] if stack else None  # Current group in stack
-                # Append the question with the group info
-                questions_with_group_info.append(row1.to_dict())
+        # Optional question columns
+        self._optional_columns = ["relevant", "calculation","required", "choice_filter", "constraint", self._const_msg]
+
+    def _parse_survey(self):
+
+        """Parse the survey group structure and the questions."""
 
-        # Convert the group info into a DataFrame
-        res, _ = Form.extract_groups(self._group_od)
-        self._group_df = pd.DataFrame(res)
+        # Parse groups with column operations and assign the enclosing group to questions
+        self._group_df, self._group_od, group_id = Form.parse_groups(self._survey_df)
 
-        # Load questions
-        questions = pd.DataFrame(questions_with_group_info)
+        # Load questions, i.e. all rows that do not begin or end a group or repeat
+        is_marker = self._survey_df["type"].isin(Form._begin_types + Form._end_types)
+        questions = self._survey_df.assign(group_id = group_id)[~is_marker].reset_index(drop = True)
 
         self._notes = questions[questions["type"] == "note"]
-        # Define mandatory and optional columns
+        # Define mandatory columns
         mandatory_columns = ["index", "group_id", "type", "name", self._label]
-        self._optional_columns = ["relevant", "calculation","required", "choice_filter", "constraint", self._const_msg]
 
         # Combine for desired columns list
         desired_columns = mandatory_columns + self._optional_columns
@@ -217,11 +477,353 @@ class Form:
 
         self._questions = questions.reset_index(drop=True)
 
-        # Load choices columns
-        self._choices_columns = self._choices_df.columns.tolist()
+        if self._compact:
+            self._questions = compact_frame(self._questions, Form._categorical_columns, Form._text_columns)
+            self._notes = compact_frame(self._notes, Form._categorical_columns, Form._text_columns)
+
+    # Memory footprint
+
+    # The settings sheet has a single row, where a categorical would take more memory than the value itself,
+    # so setting values are not listed
+    _categorical_columns = ["type", "group_id", "list_name", "required", "read_only", "appearance"]
+    _text_columns = ["label", "hint", "guidance_hint", "constraint_message", "required_message",
+                     "image", "audio", "video", "media", "relevant", "calculation", "constraint",
+                     "choice_filter", "default", "repeat_count", "trigger"]
+
+    def compact(self):
+
+        """Convert the form data to compact column types to reduce memory usage.
+
+        Low-cardinality columns (type, group_id, list_name, required, read_only, appearance) become
+        categoricals, and labels and expressions become Arrow-backed strings when pyarrow is installed.
+        Derived frames built later (questions, notes) are converted as well. Returns the form itself."""
+
+        self._compact = True
+        for name in ["_survey_df", "_choices_df", "_settings_df", "_entities_df", "_questions", "_notes"]:
+            df = getattr(self, name)
+            if df is not None:
+                setattr(self, name, compact_frame(df, Form._categorical_columns, Form._text_columns))
+        self._translations = None
+        return self
+
+    def memory_usage(self):
+
+        """Return the memory used by each sheet, derived frame and derived structure of the form, in bytes.
+
+        Derived frames and structures that have not been built yet are not included. The size of Python
+        objects (common words, sheet digests) is approximate."""
+
+        frames = [
+            ("survey", self._survey_df),
+            ("choices", self._choices_df),
+            ("settings", self._settings_df),
+            ("entities", self._entities_df),
+            ("questions", self._questions),
+            ("notes", self._notes),
+            ("groups", self._group_df),
+            ("translations", self._translations)]
+        usage = {name: int(df.memory_usage(index = True, deep = True).sum()) for name, df in frames if df is not None}
+        if self._label_index is not None:
+            usage["label_index"] = self._label_index.memory_usage()
+        objects = [
+            ("common_words", self._common_words),
+            ("common_words_by_language", self._common_words_by_language),
+            ("sheet_digests", self._sheet_digests)]
+        usage.update({name: object_memory_usage(obj) for name, obj in objects if obj is not None})
+        return pd.Series(usage, name = "bytes", dtype = "int64")
+
+    # Content fingerprints
+
+    @staticmethod
+    def row_fingerprints(df, columns = None):
+
+        """Return a stable 64-bit content hash of every row of a DataFrame over the given columns.
+
+        The column names are part of the hash, so that every fingerprint changes when the set of
+        compared columns changes. The row index is not, so that inserting rows elsewhere does not change
+        the fingerprint of a row. Cells are hashed with their type (see typed_text), so that a value
+        changed from 1 to "1" changes the fingerprint, as it changes the result of the comparisons.
+
+        param (DataFrame): df rows to hash
+        param (list): columns columns to hash, all columns by default"""
+
+        columns = list(df.columns) if columns is None else columns
+        values = pd.DataFrame({i: typed_text(df[col].to_numpy(dtype = object)) for i, col in enumerate(columns)},
+                              index = df.index)
+        values["_columns"] = "\x1f".join(map(str, columns))
+        return pd.util.hash_pandas_object(values, index = False)
+
+    @staticmethod
+    def frame_digest(df):
+
+        """Return a canonical SHA-256 digest of a DataFrame, built from its row fingerprints, or None."""
+
+        if df is None:
+            return None
+        return hashlib.sha256(Form.row_fingerprints(df).to_numpy().tobytes()).hexdigest()
+
+    @property
+    def sheet_digests(self):
+        """Canonical digest of the survey, choices, settings and entities sheets, computed once."""
+        if self._sheet_digests is None:
+            self._sheet_digests = {
+                "survey": Form.frame_digest(self._survey_df),
+                "choices": Form.frame_digest(self._choices_df),
+                "settings": Form.frame_digest(self._settings_df),
+                "entities": Form.frame_digest(self._entities_df)}
+        return self._sheet_digests
+
+    def sameSheet(self, f, sheet):
+
+        """Return True if a sheet holds the same content in both forms."""
+
+        digest = self.sheet_digests[sheet]
+        return (digest is not None) and (digest == f.sheet_digests[sheet])
+
+    @staticmethod
+    def unchangedKeys(cur_fp, ref_fp, prev_cur_fp, prev_ref_fp):
+
+        """Return the keys whose fingerprints are the same as in a previous comparison, in both forms.
+
+        A key that is missing from a form gets fingerprint 0 on that side, so that an added or removed key
+        is only considered unchanged if it was already added or removed in the previous comparison.
+        Nothing is returned if keys are not unique."""
+
+        fps = [cur_fp, ref_fp, prev_cur_fp, prev_ref_fp]
+        if not all(fp.index.is_unique for fp in fps):
+            return pd.Index([])
+        keys = fps[0].index
+        for fp in fps[1:]:
+            keys = keys.union(fp.index)
+        same = np.ones(len(keys), dtype = bool)
+        for fp, prev_fp in [(cur_fp, prev_cur_fp), (ref_fp, prev_ref_fp)]:
+            same &= fp.reindex(keys, fill_value = 0).to_numpy() == prev_fp.reindex(keys, fill_value = 0).to_numpy()
+        return keys[same]
+
+    @property
+    def survey_fingerprints(self):
+        """Content hash of every survey row, indexed like the survey sheet."""
+        return Form.row_fingerprints(self._survey_df, [col for col in self._survey_df.columns if col != "index"])
+
+    @property
+    def question_fingerprints(self):
+        """Content hash of every question over its compared columns, indexed by question name."""
+        columns = [col for col in self.questions.columns if col != "index"]
+        return Form.row_fingerprints(self.questions, columns).set_axis(self.questions["name"])
+
+    @property
+    def choice_fingerprints(self):
+        """Content hash of every choice, indexed by (list_name, name)."""
+        columns = [col for col in self._choices_df.columns if col != "index"]
+        return Form.row_fingerprints(self._choices_df, columns) \
+            .set_axis(pd.MultiIndex.from_frame(self._choices_df[["list_name", "name"]]))
+
+    @property
+    def list_fingerprints(self):
+        """Content hash of every choice list, combining the fingerprints of its choices, indexed by list_name."""
+        fp = self.choice_fingerprints
+        digests = {
+            list_name: np.uint64(int.from_bytes(hashlib.sha256(values.to_numpy().tobytes()).digest()[:8], "little"))
+            for list_name, values in fp.groupby(level = "list_name", sort = False, observed = True)}
+        return pd.Series(digests, dtype = "uint64").rename_axis("list_name")
+
+    @property
+    def settings_fingerprints(self):
+        """Content hash of every settings entry, indexed by setting name."""
+        if self._settings_df is None or self._settings_df.shape[0] == 0:
+            return pd.Series([], dtype = "uint64")
+        row = self._settings_df.iloc[0]
+        return pd.util.hash_pandas_object(pd.Series(typed_text(row.to_numpy(dtype = object)), index = row.index), index = True)
+
+    # Cache of parsed forms
+
+    _cached_frames = ["survey_df", "choices_df", "settings_df", "entities_df", "questions", "notes", "group_df"]
+
+    @classmethod
+    def load(cls, in_xlsx, cache_dir = None, engine = None, compact = False):
+
+        """Create a Form object, reusing a previously parsed copy from an on-disk cache.
+
+        The cache is opt-in: without cache_dir this is equivalent to Form(in_xlsx, engine).
+        Cache entries are keyed by the SHA-256 of the XLSForm content, the library version, the cache
+        format (cache_format) and the Excel engine, so an edited form or an upgraded library never reuses
+        stale entries.
+
+        in_xlsx (string): The path to the XLSForm spreadsheet file.
+        cache_dir (string): The directory in which parsed forms are stored.
+        engine (string): The pandas Excel engine used to read the workbook on a cache miss.
+        compact (bool): If True, the form data is stored with compact column types (see compact())."""
+
+        if cache_dir is None:
+            return cls(in_xlsx, engine = engine, compact = compact)
+
+        if not os.path.exists(in_xlsx) or not in_xlsx.endswith('.xlsx'):
+            raise FileNotFoundError(f"File {in_xlsx} not found. Cannot create Form object.")
+
+        return cls._load_cached(file_sha256(in_xlsx), cache_dir, engine, compact, in_xlsx, os.path.basename(in_xlsx),
+                                lambda: cls(in_xlsx, engine = engine, compact = compact))
+
+    @classmethod
+    def _load_cached(cls, sha, cache_dir, engine, compact, source, name, build):
+
+        """Return the cached Form object for a content hash, or build it with build() and cache it."""
+
+        key = "{}_{}_f{}_{}{}".format(sha, __version__, cache_format, engine or "default", "_compact" if compact else "")
+        entry_dir = os.path.join(cache_dir, key)
+
+        if os.path.exists(os.path.join(entry_dir, "meta.json")):
+            try:
+                f = cls._from_cache(entry_dir)
+                f._source = source
+                f._file_name = name
+                print(f"📝 Load Form object for {name} from cache")
+                return f
+            except Exception as e:
+                print(f"\t - ⚠️ Ignoring unreadable cache entry {key}: {e}")
+
+        f = build()
+        f._save_cache(entry_dir)
+        return f
+
+    @classmethod
+    def from_buffer(cls, buffer, name = None, engine = None, compact = False):
+
+        """Create a Form object from a binary file-like object, e.g. an uploaded file, without writing it to disk.
+
+        buffer (file-like): A binary stream holding the XLSForm workbook.
+        name (string): The file name reported for the form."""
 
-        # Common words
-        self._common_words = find_common_words(self._questions, self._label)
+        return cls(buffer, engine = engine, compact = compact, name = name)
+
+    @classmethod
+    def from_bytes(cls, data, name = None, engine = None, compact = False, cache_dir = None):
+
+        """Create a Form object from the bytes of an XLSForm workbook, without writing them to disk.
+
+        data (bytes): The content of the XLSForm workbook.
+        name (string): The file name reported for the form.
+        cache_dir (string): Optional directory of parsed forms, keyed by the SHA-256 of data (see load)."""
+
+        name = name or "buffer.xlsx"
+        build = lambda: cls(io.BytesIO(data), engine = engine, compact = compact, name = name)
+        if cache_dir is None:
+            return build()
+        return cls._load_cached(hashlib.sha256(data).hexdigest(), cache_dir, engine, compact, None,
+                                os.path.basename(name), build)
+
+    @staticmethod
+    def zip_members(zip_path):
+
+        """List the XLSForm workbooks (.xlsx members) of a zip bundle (path or open ZipFile), skipping Office lock
+        files and macOS metadata."""
+
+        if not isinstance(zip_path, zipfile.ZipFile):
+            with zipfile.ZipFile(zip_path) as zf:
+                return Form.zip_members(zf)
+        return [member for member in zip_path.namelist()
+                if member.lower().endswith(".xlsx")
+                and not member.startswith("__MACOSX/")
+                and not os.path.basename(member).startswith("~$")]
+
+    @classmethod
+    def from_zip(cls, zip_path, member, engine = None, compact = False, cache_dir = None):
+
+        """Create a Form object from one workbook of a zip bundle of XLSForms, reading it in memory.
+
+        zip_path (string or file-like): The zip bundle.
+        member (string): The path of the XLSForm workbook inside the bundle (see zip_members)."""
+
+        with zipfile.ZipFile(zip_path) as zf:
+            data = zf.read(member)
+        return cls.from_bytes(data, name = member, engine = engine, compact = compact, cache_dir = cache_dir)
+
+    @classmethod
+    def iter_zip(cls, zip_path, engine = None, compact = False, cache_dir = None):
+
+        """Yield (member, Form) pairs for every XLSForm workbook of a zip bundle, opening the bundle once."""
+
+        with zipfile.ZipFile(zip_path) as zf:
+            for member in cls.zip_members(zf):
+                yield member, cls.from_bytes(zf.read(member), name = member, engine = engine,
+                                             compact = compact, cache_dir = cache_dir)
+
+    def _save_cache(self, entry_dir):
+
+        """Store the parsed sheets and derived frames in a cache entry directory.
+
+        Returns False, with a warning, if the entry cannot be written."""
+
+        # Build the lazily derived structures so that they are stored as well
+        self.questions
+        self.common_words
+
+        tmp_dir = None
+        try:
+            parent = os.path.dirname(os.path.abspath(entry_dir))
+            os.makedirs(parent, exist_ok = True)
+            # Write into a temporary directory first so that readers never see partial entries
+            tmp_dir = tempfile.mkdtemp(dir = parent)
+            frames = {}
+            for name in Form._cached_frames:
+                df = getattr(self, "_" + name)
+                frames[name] = None if df is None else write_frame(df, os.path.join(tmp_dir, name))
+            meta = {
+                "version": __version__,
+                "format": cache_format,
+                "compact": self._compact,
+                "frames": frames,
+                "survey_lang_columns": self._survey_lang_columns,
+                "common_words": self._common_words,
+                "group_od": self._group_od
+            }
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding = "utf-8") as fh:
+                json.dump(meta, fh)
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # Another process stored the same entry in the meantime
+                shutil.rmtree(tmp_dir, ignore_errors = True)
+        except (OSError, ValueError, TypeError, NotImplementedError) as e:
+            # Caching is an optimization only: the form is parsed, so loading goes on without a cache entry
+            # (e.g. read-only cache directory, or column labels that Parquet cannot store; pyarrow errors
+            # derive from these exception types)
+            if tmp_dir is not None:
+                shutil.rmtree(tmp_dir, ignore_errors = True)
+            print(f"\t - ⚠️ Could not store {self._file_name} in cache {entry_dir}: {e}")
+            return False
+        return True
+
+    @classmethod
+    def _from_cache(cls, entry_dir):
+
+        """Rebuild a Form object from a cache entry directory without re-parsing the XLSForm."""
+
+        with open(os.path.join(entry_dir, "meta.json"), encoding = "utf-8") as fh:
+            meta = json.load(fh, object_pairs_hook = OrderedDict)
+
+        f = cls.__new__(cls)
+        for name, file_name in meta["frames"].items():
+            setattr(f, "_" + name, None if file_name is None else read_frame(os.path.join(entry_dir, file_name)))
+        f._survey_lang_columns = list(meta["survey_lang_columns"])
+        f._common_words = list(meta["common_words"])
+        f._common_words_by_language = None
+        f._translations = None
+        f._label_index = None
+        f._sheet_digests = None
+        f._compact = bool(meta.get("compact", False))
+        f._group_od = meta["group_od"]
+        f._list_names, f._choices_columns = [], []
+        f._init_attributes()
+        return f
+
+    @property
+    def file_name(self):
+        return self._file_name
+
+    @property
+    def source(self):
+        """Path of the XLSForm file the form was read from, None when it was read from memory."""
+        return self._source
 
     @property
     def survey(self):
@@ -237,10 +839,14 @@ class Form:
 
     @property
     def group_od(self):
+        if self._questions is None:
+            self._parse_survey()
         return self._group_od
 
     @property
     def groups(self):
+        if self._questions is None:
+            self._parse_survey()
         return self._group_df
 
     @property
@@ -313,11 +919,66 @@ class Form:
     
     @property
     def questions(self):
+        if self._questions is None:
+            self._parse_survey()
         return self._questions
 
+    @property
+    def common_words(self):
+        if self._common_words is None:
+            self._common_words = find_common_words(self.questions, self._label)
+        return self._common_words
+
+    @property
+    def common_words_by_language(self):
+        if self._common_words_by_language is None:
+            is_marker = self._survey_df["type"].isin(Form._begin_types + Form._end_types)
+            self._common_words_by_language = find_common_words_by_language(self._survey_df[~is_marker])
+        return self._common_words_by_language
+
     @property
     def choices_columns(self):
         return self._choices_columns
+
+    @property
+    def languages(self):
+        """Languages of the translatable survey columns, "default" standing for columns without language."""
+        languages = []
+        for col in self._survey_columns:
+            field, _, language = str(col).partition("::")
+            if field in self._survey_lang_columns:
+                language = language or "default"
+                if language not in languages:
+                    languages.append(language)
+        return languages
+
+    @property
+    def label_index(self):
+        """Character n-gram TF-IDF index of the main labels, built on first access."""
+        if self._label_index is None:
+            # LabelIndex relies on scikit-learn, so only import it when needed
+            from LabelIndex import LabelIndex
+            self._label_index = LabelIndex.from_form(self)
+        return self._label_index
+
+    @property
+    def translations(self):
+        """Matrix of all translatable texts: one row per question name, (field, language) column pairs."""
+        if self._translations is None:
+            is_marker = self._survey_df["type"].isin(Form._begin_types + Form._end_types)
+            survey = self._survey_df[~is_marker & self._survey_df["name"].notnull()] \
+                .drop_duplicates(subset = "name")
+            columns = []
+            for col in self._survey_columns:
+                field, _, language = str(col).partition("::")
+                if field in self._survey_lang_columns:
+                    columns.append((col, field, language or "default"))
+            self._translations = pd.DataFrame(
+                survey[[col for col, _, _ in columns]].to_numpy(dtype = object),
+                index = pd.Index(survey["name"], name = "name"),
+                columns = pd.MultiIndex.from_tuples([(field, language) for _, field, language in columns],
+                                                    names = ["field", "language"]))
+        return self._translations
     
     """This method is intended to return the parent of the form. However, the parent attribute (_parent) is not set within the class, so this method may not provide the expected functionality without additional implementation."""
     
@@ -340,13 +1001,17 @@ class Form:
         ]
 
         comparisons = []
+        # Identical settings sheets: every attribute in use is unchanged
+        same = self.sameSheet(f, "settings")
 
         for attr, current, ref in settings_attributes:
 
             if current is None and ref is None:
                 continue  # Ignore attributes not used in either form
 
-            if current is None:
+            if same:
+                status = "unchanged"
+            elif current is None:
                 status = "added"
             elif ref is None:
                 status = "removed"
@@ -357,6 +1022,68 @@ class Form:
 
         return pd.DataFrame(comparisons, columns=["variable", "status", "current", "ref"])
 
+    _begin_types = ["begin group", "begin_group", "begin repeat", "begin_repeat"]
+    _end_types = ["end group", "end_group", "end repeat", "end_repeat"]
+
+    @staticmethod
+    def parse_groups(survey_df):
+
+        """Compute the group and repeat structure of a survey sheet with array operations.
+
+        The depth of every row is the running count of begin markers minus end markers. The enclosing
+        group of a row at depth d is the last begin marker at depth d - 1 seen so far, found with a
+        running maximum per depth level, so the survey is never walked row by row.
+
+        Returns the groups DataFrame (group_id, name, parent, depth, order, type), the nested
+        OrderedDict of groups and, for every survey row, the name of its enclosing group (None at top level)."""
+
+        types = survey_df["type"]
+        is_begin = types.isin(Form._begin_types).to_numpy()
+        is_end = types.isin(Form._end_types).to_numpy()
+
+        # Number of open groups after each row, and depth of each row itself
+        n_open = np.cumsum(is_begin, dtype = np.int64) - np.cumsum(is_end, dtype = np.int64)
+        if len(n_open) and n_open.min() < 0:
+            row = survey_df["index"].iloc[int(np.argmax(n_open < 0))] if "index" in survey_df.columns else int(np.argmax(n_open < 0))
+            raise ValueError(f"Unmatched end of group or repeat in survey row {row}")
+        depth = n_open - is_begin + is_end
+
+        # Position of the enclosing begin marker of every row (-1 at top level)
+        positions = np.arange(len(types))
+        enclosing = np.full(len(types), -1)
+        for level in range(int(depth.max()) if len(depth) else 0):
+            last_begin = np.maximum.accumulate(np.where(is_begin & (depth == level), positions, -1))
+            inner = depth == level + 1
+            enclosing[inner] = last_begin[inner]
+
+        names = survey_df["name"].astype(str).to_numpy(dtype = object)
+        group_id = pd.Series(np.where(enclosing >= 0, names[enclosing], None), index = survey_df.index, dtype = object)
+
+        # One row per group, in document order
+        begin_pos = positions[is_begin]
+        group_index = np.cumsum(is_begin) - 1
+        parent_pos = enclosing[is_begin]
+        parent_id = np.where(parent_pos >= 0, group_index[parent_pos], -1)
+        gtypes = np.where(types[is_begin].str.contains("repeat"), "repeat", "group")
+        group_df = pd.DataFrame({
+            "group_id": np.arange(len(begin_pos)),
+            "name": names[begin_pos],
+            "parent": group_id.to_numpy()[begin_pos],
+            "depth": depth[begin_pos],
+            "order": pd.Series(parent_id).groupby(parent_id).cumcount().to_numpy(),
+            "type": gtypes
+        })
+
+        # Nested dictionary of groups, keyed as "<type>____<name>"
+        group_od = OrderedDict()
+        nodes = []
+        for gtype, name, parent in zip(gtypes, group_df["name"], parent_id):
+            node = OrderedDict()
+            (group_od if parent < 0 else nodes[parent])[f"{gtype}____{name}"] = node
+            nodes.append(node)
+
+        return group_df, group_od, group_id
+
     @staticmethod
     def extract_groups(d, parent = None, depth = 0, results = None, order = 0, group_id = 0):
         
@@ -425,33 +1152,125 @@ class Form:
             edit_distance = 1.0
         return edit_distance
 
+    @staticmethod
+    def get_normalized_edit_distances(s1, s2, score_cutoff = None):
+
+        """Compute normalized edit distances between two aligned sequences of strings in one call.
+
+        Identical pairs are set to 0 without computing anything, and pairs where one value is not a string
+        (e.g. empty) or both are empty strings are set to 1.0, as in get_normalized_edit_distance.
+        The remaining pairs are computed natively by rapidfuzz in a single batch.
+
+        param (list-like): s1 current strings
+        param (list-like): s2 reference strings, aligned with s1
+        param (float): score_cutoff optional upper bound, distances above it are returned as 1.0"""
+
+        x = np.asarray(pd.Series(s1, dtype = object).to_numpy(), dtype = object)
+        y = np.asarray(pd.Series(s2, dtype = object).to_numpy(), dtype = object)
+        out = np.ones(len(x), dtype = float)
+        if len(x) == 0:
+            return out
+
+        is_str = np.fromiter((isinstance(a, str) and isinstance(b, str) and (len(a) > 0 or len(b) > 0)
+                              for a, b in zip(x, y)), dtype = bool, count = len(x))
+        same = np.zeros(len(x), dtype = bool)
+        same[is_str] = x[is_str] == y[is_str]
+        out[same] = 0.0
+
+        todo = is_str & ~same
+        if todo.any():
+            out[todo] = rf_process.cpdist(x[todo].tolist(), y[todo].tolist(),
+                                          scorer = rf_levenshtein.normalized_distance,
+                                          score_cutoff = score_cutoff,
+                                          dtype = np.float64)
+        return out
+
+    @staticmethod
+    def checkModifications(x, y, normalize = None):
+
+        """Compare two aligned columns at once and return 1 where they differ, 0 elsewhere.
+
+        Empty values are considered equivalent to each other: both empty gives 0, only one empty gives 1.
+        If normalize is given (e.g. XPathExpression.canonical), values are compared on normalize(value)."""
+
+        x_null = x.isnull().to_numpy()
+        y_null = y.isnull().to_numpy()
+        # Replace empty values so that the element-wise comparison only sees actual values
+        x_values = x.astype(object).to_numpy()
+        y_values = y.astype(object).to_numpy()
+        x_values[x_null] = None
+        y_values[y_null] = None
+        if normalize is None:
+            differ = (x_values != y_values).astype(bool)
+        else:
+            differ = np.fromiter((normalize(a) != normalize(b) for a, b in zip(x_values, y_values)),
+                                 dtype = bool, count = len(x_values))
+        return ((x_null != y_null) | (~x_null & ~y_null & differ)).astype(int)
+
     # Compare columns
 
+    @staticmethod
+    def matchModifiedColumns(removed, added, thres = 0.5):
+
+        """Pair removed and added column names that likely are the same column with a modified suffix.
+
+        Names are bucketed by their part before the first "::" (e.g. "label" or "hint" in "label::English", or
+        "media" in "media::image::English"), and compared on the next part (the language, or "image"). Inside each
+        bucket the pairs are chosen by optimal one-to-one assignment on the normalized edit distance of these
+        suffixes, so that every name is matched to its best candidate rather than to the first one found.
+        Only pairs with a distance strictly between 0 and thres are kept. scipy is only imported when
+        both forms have candidate pairs.
+
+        param (list): removed names of the removed columns
+        param (list): added names of the added columns
+        param (float): thres upper bound on the normalized edit distance of the suffixes"""
+
+        def buckets(names):
+            out = {}
+            for name in sorted(names):
+                split = name.split("::")
+                if len(split) > 1:
+                    out.setdefault(split[0], []).append((name, split[1].strip()))
+            return out
+
+        removed_buckets, added_buckets = buckets(removed), buckets(added)
+        modified = []
+        for prefix in sorted(removed_buckets.keys() & added_buckets.keys()):
+            rbucket, abucket = removed_buckets[prefix], added_buckets[prefix]
+            d = rf_process.cdist([item[1] for item in rbucket], [item[1] for item in abucket],
+                                 scorer = rf_levenshtein.normalized_distance,
+                                 dtype = np.float64)
+            valid = (d > 0) & (d < thres)
+            if not valid.any():
+                continue
+            from scipy.optimize import linear_sum_assignment
+            # Invalid pairs get a cost above any valid one so that they are only used when unavoidable
+            rows, cols = linear_sum_assignment(np.where(valid, d, thres + 1))
+            modified += [(rbucket[i][0], abucket[j][0]) for i, j in zip(rows, cols) if valid[i, j]]
+        return modified
+
     def compareColumns(self, f, sheet):
 
         """Compare columns with custom logic for modified items."""
 
+        if self.sameSheet(f, sheet):
+            columns = self._survey_columns if sheet == "survey" else self._choices_columns
+            return pd.DataFrame({
+                "name": columns,
+                "status": ['unchanged'] * len(columns)
+            }).sort_values(by="name", ascending=True)
+
         if sheet == "survey":
             unchanged, added, removed = Form.detectChanges(self._survey_columns, f.survey_columns)
         elif sheet == "choices":
             unchanged, added, removed = Form.detectChanges(self._choices_columns, f.choices_columns)
 
-         # Detect modified items (based on shared prefix)
-        modified = []
-        thres = 0.5
-        for removed_item in removed[:]:
-            #if any(word in removed_item for word in self.survey_lang_columns): 
-            rsplit = removed_item.split("::")
-            for added_item in added[:]:
-                    asplit = added_item.split("::")
-                    if (rsplit[0] == asplit[0]):
-                        if len(rsplit) > 1 and len(asplit) > 1:
-                            d = Form.get_normalized_edit_distance(rsplit[1].strip(),asplit[1].strip())
-                            if d > 0 and d < thres:
-                                modified.append((removed_item, added_item))
-                                removed.remove(removed_item)
-                                added.remove(added_item)
-                        break
+        # Detect modified items (based on shared prefix)
+        modified = Form.matchModifiedColumns(removed, added)
+        matched_removed = {item[0] for item in modified}
+        matched_added = {item[1] for item in modified}
+        removed = [item for item in removed if item not in matched_removed]
+        added = [item for item in added if item not in matched_added]
 
         if modified == []:
             return pd.DataFrame({
@@ -497,7 +1316,7 @@ class Form:
 
     def detectGroups(self, f, status):
 
-        out = pd.merge(left = self._group_df,
+        out = pd.merge(left = self.groups,
                        right = f.groups,
                        on = "name",
                        how = 'outer')
@@ -538,27 +1357,215 @@ class Form:
 
     # Choice list names
 
+    def sameChoices(self, f):
+
+        """Return True if both forms have the same choices sheet and read their labels from the same column.
+
+        Forms with different default languages compare different label columns of the same sheet."""
+
+        return self.sameSheet(f, "choices") and (self._label == f.main_label)
+
     def compareListNames(self, f):
 
-        return self.summariseChanges(self._list_names, f.list_names)
+        if self.sameChoices(f):
+            return Form.summariseChanges(self._list_names, self._list_names)
 
-    def compareChoices(self, f):
+        return self.summariseChanges(self._list_names, f.list_names)
 
-        unchanged_df = self.detectUnchangedChoices(f)
-        added_df = self.detectAddedChoices(f)
-        removed_df = self.detectDeletedChoices(f)
+    def alignChoices(self, f, list_name_df = None):
 
-        out = pd.concat([unchanged_df, added_df, removed_df], join = "outer") \
-            .sort_values(by=["list_name", "name"], ascending=[True, True], key = lambda x: x.str.lower())
+        """Align the choices of both forms on (list_name, name) in a single outer merge.
 
-        return out#[["list_name", "name", "status", "current_label", "reference_label"]]
+        Returns the merged choices and the list name comparison (see compareListNames), which are
+        shared by detectUnchangedChoices, detectAddedChoices and detectDeletedChoices. An already
+        computed list name comparison can be passed to avoid computing it again."""
 
-    def detectUnchangedChoices(self, f):
+        if self._choices_df is None or f.choices is None:
+            raise ValueError("Choices sheet not loaded (see choices_chunksize), compare choices with streamCompareChoices")
 
         out = pd.merge(left = self._choices_df.rename(columns = {self._label: "label"}),
                        right = f.choices.rename(columns = {f.main_label: "label"}),
                        on = ["list_name", "name"],
                        how = 'outer')
+
+        if list_name_df is None:
+            list_name_df = self.compareListNames(f)
+
+        return out, list_name_df
+
+    def compareChoices(self, f, list_name_df = None, previous = None):
+
+        """Compare the choices of both forms.
+
+        param (Form): f reference form
+        param (DataFrame): list_name_df optional result of compareListNames
+        param (tuple): previous optional (choices_df, cur_fingerprints, ref_fingerprints) of an earlier comparison,
+        with the list fingerprints of both forms at that time. The rows of the lists whose fingerprints did not
+        change in either form are taken from choices_df instead of being compared again."""
+
+        if self.sameChoices(f) and not self._choices_df.duplicated(subset = ["list_name", "name"]).any():
+            return self.unchangedChoices()
+
+        # Merge both choice sets and compare list names once, then derive every status from them
+        aligned = self.alignChoices(f, list_name_df)
+        reused_df = None
+        if previous is not None:
+            prev_df, prev_cur_fp, prev_ref_fp = previous
+            reused = Form.unchangedKeys(self.list_fingerprints, f.list_fingerprints, prev_cur_fp, prev_ref_fp)
+            reused_df = prev_df[prev_df["list_name"].isin(reused)]
+            reused_df = reused_df if reused_df.shape[0] > 0 else None
+            choices, list_name_df = aligned
+            aligned = (choices[~choices["list_name"].isin(reused)], list_name_df)
+            print(f"\t - ℹ️ {len(reused)} choice lists reused from the previous comparison")
+        unchanged_df = self.detectUnchangedChoices(f, aligned)
+        added_df = self.detectAddedChoices(f, aligned)
+        removed_df = self.detectDeletedChoices(f, aligned)
+
+        out = pd.concat([unchanged_df, added_df, removed_df, reused_df], join = "outer") \
+            .sort_values(by=["list_name", "name"], ascending=[True, True], key = lambda x: x.str.lower())
+
+        return out#[["list_name", "name", "status", "current_label", "reference_label"]]
+
+    def unchangedChoices(self):
+
+        """Return the comparison of the choices with an identical choices sheet, without merging them.
+
+        The result has the same rows and columns as compareChoices on two identical sheets."""
+
+        choices = self._choices_df.rename(columns = {self._label: "label"})
+        choices = choices[choices["label"].notnull()].reset_index(drop = True)
+        other_cols = [col for col in choices.columns if col not in ["list_name", "name", "label"]]
+
+        out = pd.concat([
+            choices[["list_name", "name"]],
+            pd.DataFrame({
+                "status": np.where(Form.get_normalized_edit_distances(choices["label"], choices["label"]) == 0,
+                                   "unchanged", "modified_label"),
+                "current_label": choices["label"],
+                "reference_label": choices["label"]}),
+            choices[other_cols].add_suffix("_x"),
+            choices[other_cols].add_suffix("_y")], axis = 1)
+
+        return out.sort_values(by=["list_name", "name"], ascending=[True, True], key = lambda x: x.str.lower())
+
+    @staticmethod
+    def scanChoices(in_xlsx, chunksize = 10000):
+
+        """Scan the choices sheet of an XLSForm file in chunks, without loading it.
+
+        Returns the list names (in order of appearance), the column names and the number of rows."""
+
+        list_names, columns, rows = {}, [], 0
+        for chunk in iter_choices_chunks(in_xlsx, chunksize):
+            columns = chunk.columns.tolist()
+            list_names.update(dict.fromkeys(chunk["list_name"]))
+            rows += chunk.shape[0]
+        return list(list_names), columns, rows
+
+    @staticmethod
+    def streamCompareChoices(cur_xlsx, ref_xlsx, chunksize = 10000, cur_label = None, ref_label = None):
+
+        """Compare the choices sheets of two XLSForm files with bounded memory.
+
+        Neither sheet is ever loaded as a whole. The reference sheet is streamed in chunks of chunksize rows
+        into sorted arrays of 64-bit hashes of its (list_name, name) keys and labels. Each chunk of the current
+        sheet is then classified against these arrays and its unchanged, added and list_name_added choices are
+        yielded at once. Modified choices, and choices whose current label is empty, are kept until the
+        reference sheet is streamed a second time to read their reference labels, along with the removed and
+        list_name_removed choices. Memory thus grows with 17 bytes per reference choice and with the number of
+        differences, not with the size of the sheets. The statuses are the same as in compareChoices, but only
+        the list_name, name, status, current_label and reference_label columns are returned, and the rows are
+        not sorted.
+
+        cur_label / ref_label (string): Label columns to compare, by default the label of the default
+        language found in the settings sheet of each form."""
+
+        def main_label(in_xlsx):
+            settings_df = read_sheets(in_xlsx, ["settings"])["settings"]
+            default_language = None if settings_df is None else settings_df.get("default_language", [None])[0]
+            return "::".join(x for x in ["label", default_language] if x)
+
+        def chunks(in_xlsx, label):
+            for chunk in iter_choices_chunks(in_xlsx, chunksize):
+                if chunk.empty:
+                    continue
+                labels = chunk[label].to_numpy(dtype = object) if label in chunk.columns else np.full(chunk.shape[0], None, dtype = object)
+                list_names, names = chunk["list_name"].to_numpy(dtype = object), chunk["name"].to_numpy(dtype = object)
+                # Values are hashed with their type, as in the sheet digests: 1 and "1" differ as in compareChoices,
+                # but a name read as int in one chunk and as float in another hashes the same
+                keys = pd.util.hash_pandas_object(pd.DataFrame({"list_name": typed_text(list_names), "name": typed_text(names)}),
+                                                  index = False).to_numpy()
+                yield list_names, names, labels, keys, pd.util.hash_array(typed_text(labels)), pd.notnull(labels)
+
+        cur_label = cur_label or main_label(cur_xlsx)
+        ref_label = ref_label or main_label(ref_xlsx)
+        columns = ["list_name", "name", "status", "current_label", "reference_label"]
+
+        # First pass on the reference choices: sorted key hashes, with their label hashes and whether they have a label
+        ref_list_names, ref_keys, ref_label_hashes, ref_has_label = set(), [], [], []
+        for list_names, _, _, keys, label_hashes, has_label in chunks(ref_xlsx, ref_label):
+            ref_list_names.update(list_names)
+            ref_keys.append(keys)
+            ref_label_hashes.append(label_hashes)
+            ref_has_label.append(has_label)
+        ref_keys = np.concatenate(ref_keys or [np.array([], dtype = np.uint64)])
+        order = np.argsort(ref_keys, kind = "stable")
+        ref_keys = ref_keys[order]
+        ref_label_hashes = np.concatenate(ref_label_hashes or [ref_keys])[order]
+        ref_has_label = np.concatenate(ref_has_label or [np.array([], dtype = bool)])[order]
+        ref_seen = np.zeros(len(ref_keys), dtype = bool)
+        del order
+
+        def lookup(keys):
+            # Whether every key is in the reference keys, and its (first) position there
+            pos = np.minimum(np.searchsorted(ref_keys, keys), max(len(ref_keys) - 1, 0))
+            found = np.zeros(len(keys), dtype = bool)
+            if len(ref_keys) > 0:
+                found = ref_keys[pos] == keys
+            return found, pos
+
+        # Classify the current choices chunk by chunk, modified choices wait for their reference label
+        cur_list_names, pending = set(), {}
+        for list_names, names, labels, keys, label_hashes, has_label in chunks(cur_xlsx, cur_label):
+            cur_list_names.update(list_names)
+            found, pos = lookup(keys)
+            ref_seen[pos[found]] = True
+            in_ref, same = np.zeros(len(keys), dtype = bool), np.zeros(len(keys), dtype = bool)
+            in_ref[found] = ref_has_label[pos[found]]
+            same[found] = label_hashes[found] == ref_label_hashes[pos[found]]
+
+            rows = []
+            for list_name, name, label, key, matched, same_label, labelled in zip(
+                    list_names, names, labels, keys, in_ref, same, has_label):
+                if labelled and matched:
+                    if same_label:
+                        rows.append((list_name, name, "unchanged", label, label))
+                    else:
+                        pending[key] = (list_name, name, "modified_label", label)
+                elif labelled:
+                    rows.append((list_name, name, "added" if list_name in ref_list_names else "list_name_added", label, np.nan))
+                elif matched:
+                    pending[key] = (list_name, name, "removed", np.nan)
+            if rows:
+                yield pd.DataFrame(rows, columns = columns)
+
+        # Second pass on the reference choices: labels of the pending choices, and removed choices
+        for list_names, names, labels, keys, _, has_label in chunks(ref_xlsx, ref_label):
+            _, pos = lookup(keys)
+            seen = ref_seen[pos]
+            rows = []
+            for list_name, name, label, key, matched, labelled in zip(list_names, names, labels, keys, seen, has_label):
+                if key in pending:
+                    pending_list_name, pending_name, status, cur_label_value = pending.pop(key)
+                    rows.append((pending_list_name, pending_name, status, cur_label_value, label))
+                elif labelled and not matched:
+                    rows.append((list_name, name, "removed" if list_name in cur_list_names else "list_name_removed", np.nan, label))
+            if rows:
+                yield pd.DataFrame(rows, columns = columns)
+
+    def detectUnchangedChoices(self, f, aligned = None):
+
+        out, _ = self.alignChoices(f) if aligned is None else aligned
         out = out[out["label_x"].notnull() & out["label_y"].notnull()]
 
         if (out.shape[0] == 0):
@@ -570,7 +1577,7 @@ class Form:
         # Identify other columns
         other_cols = [col for col in out.columns if not(col in ["list_name", "name", "label_x", "label_y"])]
 
-        out["status"] = out.apply(lambda row: "unchanged" if Form.get_normalized_edit_distance(s1 = row["label_x"], s2 = row["label_y"]) == 0 else "modified_label", axis = 1)
+        out["status"] = np.where(Form.get_normalized_edit_distances(out["label_x"], out["label_y"]) == 0, "unchanged", "modified_label")
 
         out = out[mandatory_cols + other_cols] \
             .rename(columns={
@@ -580,16 +1587,14 @@ class Form:
         
         return out
 
-    def detectAddedChoices(self, f):
+    def detectAddedChoices(self, f, aligned = None):
 
-        list_name_df = self.compareListNames(f).rename(columns={'name': 'list_name'})
+        out, list_name_df = self.alignChoices(f) if aligned is None else aligned
+
+        list_name_df = list_name_df.rename(columns={'name': 'list_name'})
         list_name_df.loc[list_name_df['status'] == 'added', 'status'] = 'list_name_added'
         list_name_df.loc[list_name_df['status'] == 'unchanged', 'status'] = 'added'
 
-        out = pd.merge(left = self._choices_df.rename(columns = {self._label: "label"}),
-                       right = f.choices.rename(columns = {f.main_label: "label"}),
-                       on = ["list_name", "name"],
-                       how = 'outer')
         out = out[out["label_x"].notnull() & out["label_y"].isnull()]
 
         if (out.shape[0] == 0):
@@ -607,16 +1612,14 @@ class Form:
         
         return out[["list_name", "name", "status", "current_label", "reference_label"]]
 
-    def detectDeletedChoices(self, f):
+    def detectDeletedChoices(self, f, aligned = None):
 
-        list_name_df = self.compareListNames(f).rename(columns={'name': 'list_name'})
+        out, list_name_df = self.alignChoices(f) if aligned is None else aligned
+
+        list_name_df = list_name_df.rename(columns={'name': 'list_name'})
         list_name_df.loc[list_name_df['status'] == 'removed', 'status'] = 'list_name_removed'
         list_name_df.loc[list_name_df['status'] == 'unchanged', 'status'] = 'removed'
 
-        out = pd.merge(left = self._choices_df.rename(columns = {self._label: "label"}),
-                       right = f.choices.rename(columns = {f.main_label: "label"}),
-                       on = ["list_name", "name"],
-                       how = 'outer')
         out = out[out["label_x"].isnull() & out["label_y"].notnull()]
         
         if (out.shape[0] == 0):
@@ -636,20 +1639,74 @@ class Form:
 
     # Questions
 
-    def compareQuestions(self, f):
+    def alignQuestions(self, f):
+
+        """Align the questions of both forms on name in a single outer merge.
 
-        unchanged_df = self.detectUnchangedQuestions(f)
-        added_df = self.detectAddedQuestions(f)
-        removed_df = self.detectDeletedQuestions(f)
+        The _merge indicator column tells whether a question is in both forms, only in the current
+        form (left_only) or only in the reference form (right_only). The result is shared by
+        detectUnchangedQuestions, detectAddedQuestions and detectDeletedQuestions."""
 
-        out = pd.concat([unchanged_df, added_df, removed_df], join = "outer") \
-            .sort_values(by=["order"], ascending=[True])
+        out = pd.merge(left = self.questions.rename(columns = {self._label: "label",
+                                                                self._const_msg: "constraint_message"}),
+                       right = f.questions.rename(columns = {f.main_label: "label",
+                                                             f._const_msg: "constraint_message"}),
+                       on = "name",
+                       how = 'outer',
+                       indicator = True)
+
+        return out
+
+    def compareQuestions(self, f, previous = None):
+
+        """Compare the questions of both forms.
+
+        param (Form): f reference form
+        param (tuple): previous optional (questions_df, cur_fingerprints, ref_fingerprints) of an earlier comparison,
+        with the question fingerprints of both forms at that time. The rows of the questions whose fingerprints did
+        not change in either form are taken from questions_df (with an updated order) instead of being compared again."""
+
+        # Merge both question sets once and classify every row from the same alignment
+        aligned = self.alignQuestions(f)
+        to_compare, reused_df = aligned, None
+        if previous is not None:
+            prev_df, prev_cur_fp, prev_ref_fp = previous
+            reused = Form.unchangedKeys(self.question_fingerprints, f.question_fingerprints, prev_cur_fp, prev_ref_fp)
+            reused_df = prev_df[prev_df["name"].isin(reused)] \
+                .drop(columns = ["likely_renamed_from", "rename_score"], errors = "ignore")
+            if reused_df.shape[0] > 0:
+                # Row positions may have moved, so the order is always recomputed
+                order = aligned.set_index("name")[["index_x", "index_y"]].mean(axis = 1).round(1)
+                reused_df = reused_df.assign(order = reused_df["name"].map(order))
+            to_compare = aligned[~aligned["name"].isin(reused)]
+            print(f"\t - ℹ️ {reused_df.shape[0]} questions reused from the previous comparison")
+            reused_df = reused_df if reused_df.shape[0] > 0 else None
+        unchanged_df = self.detectUnchangedQuestions(f, to_compare)
+        added_df = self.detectAddedQuestions(f, to_compare)
+        removed_df = self.detectDeletedQuestions(f, to_compare)
+
+        out = pd.concat([unchanged_df, added_df, removed_df, reused_df], join = "outer")
+        if reused_df is not None:
+            # Put reused rows back where a full comparison would have them before sorting on order,
+            # so that rows with the same order come out in the same sequence
+            position = pd.Series(np.arange(aligned.shape[0]), index = aligned["name"])
+            rank = out["status"].map({"added": 1, "removed": 2}).fillna(0)
+            out = out.assign(_rank = rank, _position = out["name"].map(position)) \
+                .sort_values(by = ["_rank", "_position"], kind = "stable") \
+                .drop(columns = ["_rank", "_position"])
+        out = out.sort_values(by=["order"], ascending=[True])
+
+        # Flag added questions that likely are renamed removed questions
+        renamed_df = self.detectRenamedQuestions(f, aligned)
+        if renamed_df is not None:
+            out = out.merge(renamed_df, on = "name", how = "left")
         
         # Always-required base columns
         base_columns = ["group_name", "name", "status", "type", "order"]
 
         # Dynamically gather optional columns from unchanged_df (if it exists)
         optional_prefixes = ["label_mod", "logic_mod", "calc_mod", "required_mod", "filter_mod", "const_mod", "const_msg_mod", "group_mod",
+                            "likely_renamed_from", "rename_score",
                             "current_label", "reference_label",
                             "current_relevant", "reference_relevant",
                             "current_calculation", "reference_calculation",
@@ -669,30 +1726,17 @@ class Form:
 
         return out[final_columns]
 
-    def detectUnchangedQuestions(self, f):
+    def detectUnchangedQuestions(self, f, aligned = None):
 
-        out = pd.merge(left = self._questions.rename(columns = {self._label: "label",
-                                                                self._const_msg: "constraint_message"}),
-                       right = f.questions.rename(columns = {f.main_label: "label",
-                                                             f._const_msg: "constraint_message"}),
-                       on = "name",
-                       how = 'outer')
+        out = self.alignQuestions(f) if aligned is None else aligned
         out = out[out["label_x"].notnull() & out["label_y"].notnull()]
 
         if (out.shape[0] == 0):
             return None
 
-        # Handle relevant and calculation modifications (consider empty values as equivalent to None)
-        def check_modification(val_x, val_y):
-            if pd.isna(val_x) and pd.isna(val_y):
-                return 0  # Both are empty, no modification
-            if pd.isna(val_x) or pd.isna(val_y):
-                return 1  # One is empty, the other is not, hence modification
-            return int(val_x != val_y)  # Both exist, check for differences
-
         out = out.reset_index(drop = True)
-        out["order"] = out.apply(lambda row: round(np.nanmean([row["index_x"], row["index_y"]]), 1), axis = 1)
-        out["label_mod"] = out.apply(lambda row: round(Form.get_normalized_edit_distance(s1 = row["label_x"].lower(), s2 = row["label_y"].lower()), 2), axis = 1)
+        out["order"] = out[["index_x", "index_y"]].mean(axis = 1).round(1)
+        out["label_mod"] = [round(d, 2) for d in Form.get_normalized_edit_distances(out["label_x"].str.lower(), out["label_y"].str.lower())]
         mod_columns = {
             "logic_mod": ("relevant_x", "relevant_y"),
             "calc_mod": ("calculation_x", "calculation_y"),
@@ -700,26 +1744,30 @@ class Form:
             "filter_mod": ("choice_filter_x", "choice_filter_y"),
             "const_mod": ("constraint_x", "constraint_y"),
             "const_msg_mod": ("constraint_message_x", "constraint_message_y"),
+            # Add group_mod outside of other "_mod" columns as otherwise too many columns flagged as modified
+            "group_mod": ("group_id_x", "group_id_y")
         }
         mod_columns = {
             new_col: (col_x, col_y)
             for new_col, (col_x, col_y) in mod_columns.items()
             if col_x in out.columns and col_y in out.columns
         }
-        # Apply the check_modification function to each pair
-        for new_col, (col_x, col_y) in mod_columns.items():
-            out[new_col] = out.apply(lambda row: check_modification(row[col_x], row[col_y]), axis=1)
+        # Compare each pair of columns at once
+        # Expressions are compared on their canonical form, so that whitespace, quoting or parenthesis edits are ignored
+        expression_columns = ["logic_mod", "calc_mod", "filter_mod", "const_mod"]
+        flags = {new_col: Form.checkModifications(out[col_x], out[col_y],
+                                                  normalize = xpath.canonical if new_col in expression_columns else None)
+                 for new_col, (col_x, col_y) in mod_columns.items()}
+        group_flag = flags.pop("group_mod", None)
+        for new_col, flag in flags.items():
+            out[new_col] = flag
 
         # Identify all columns that end with '_mod'
         mod_check_cols = [col for col in out.columns if col.endswith('_mod')]
         # Set status based on whether all mod columns are zero
-        out["status"] = out[mod_check_cols].apply(
-            lambda row: "unchanged" if all(val == 0 for val in row) else "modified",
-            axis=1
-        )
-        # Add group_mod outside of other "_mod" columns as otehrwise too many columns flagged as modified
-        for new_col, (col_x, col_y) in {"group_mod": ("group_id_x", "group_id_y")}.items():
-            out[new_col] = out.apply(lambda row: check_modification(row[col_x], row[col_y]), axis=1)
+        out["status"] = np.where((out[mod_check_cols] == 0).all(axis = 1), "unchanged", "modified")
+        if group_flag is not None:
+            out["group_mod"] = group_flag
         # Select and rename final output columns
         final_columns = [
             "order", "name", "type_y", "label_x", "label_y", "group_id_x", "group_id_y",
@@ -755,22 +1803,17 @@ class Form:
         
         return out[final_columns].rename(columns = column_renames)
 
-    def detectAddedQuestions(self, f):
+    def detectAddedQuestions(self, f, aligned = None):
 
-        out = pd.merge(left = self._questions.rename(columns = {self._label: "label",
-                                                                self._const_msg: "constraint_message"}),
-                       right = f.questions.rename(columns = {f.main_label: "label",
-                                                             f._const_msg: "constraint_message"}),
-                       on = "name",
-                       how = 'outer')
-        out = out[out["type_x"].notnull() & out["type_y"].isnull()]
+        out = self.alignQuestions(f) if aligned is None else aligned
+        out = out[out["_merge"] == "left_only"]
         
         if (out.shape[0] == 0):
             out = None
 
         else:
             out = out.reset_index(drop = True)
-            out["order"] = out.apply(lambda row: round(np.nanmean([row["index_x"], row["index_y"]]), 1), axis = 1)
+            out["order"] = out[["index_x", "index_y"]].mean(axis = 1).round(1)
             out = out[[
                 "order", "name", "type_y", "label_x", "label_y", "group_id_x",
                 "relevant_x", "relevant_y", "calculation_x", "calculation_y",
@@ -794,21 +1837,16 @@ class Form:
             
         return out
     
-    def detectDeletedQuestions(self, f):
+    def detectDeletedQuestions(self, f, aligned = None):
 
-        out = pd.merge(left = self._questions.rename(columns = {self._label: "label",
-                                                                self._const_msg: "constraint_message"}),
-                       right = f.questions.rename(columns = {f.main_label: "label",
-                                                             f._const_msg: "constraint_message"}),
-                       on = "name",
-                       how = 'outer')
-        out = out[out["type_x"].isnull() & out["type_y"].notnull()]
+        out = self.alignQuestions(f) if aligned is None else aligned
+        out = out[out["_merge"] == "right_only"]
 
         if (out.shape[0] == 0):
             out = None
         else:
             out = out.reset_index(drop = True)
-            out["order"] = out.apply(lambda row: round(np.nanmean([row["index_x"], row["index_y"]]), 1), axis = 1)
+            out["order"] = out[["index_x", "index_y"]].mean(axis = 1).round(1)
             out = out[[
                 "order", "name", "type_y", "label_x", "label_y", "group_id_x",
                 "relevant_x", "relevant_y", "calculation_x", "calculation_y",
@@ -832,13 +1870,156 @@ class Form:
 
         return out
     
+    def detectRenamedQuestions(self, f, aligned = None, threshold = 0.75, top_k = 10):
+
+        """Match added questions against removed questions to detect questions that were likely renamed.
+
+        Candidates are generated from an inverted index of character 3-grams of the normalized labels
+        (or of the calculation for questions without label) of the removed questions, restricted to the
+        same base type, so that every added question is only scored against the top_k removed questions
+        sharing the most n-grams with it. Each candidate pair is scored by label similarity (70%),
+        similarity of the relevant, calculation and constraint expressions (15%) and equality of the
+        list name (15%), and pairs are then matched one-to-one by decreasing score.
+
+        param (Form): f reference form
+        param (DataFrame): aligned optional result of alignQuestions
+        param (float): threshold minimum score for a pair to be reported
+        param (int): top_k number of candidates scored for each added question"""
+
+        out = self.alignQuestions(f) if aligned is None else aligned
+        added = out[out["_merge"] == "left_only"]
+        removed = out[out["_merge"] == "right_only"]
+
+        if (added.shape[0] == 0) or (removed.shape[0] == 0):
+            return None
+
+        def column(df, col):
+            # Optional columns may be missing from either form, and categorical or Arrow-backed
+            # (compact forms), so they are read as plain object arrays
+            if col not in df.columns:
+                return pd.Series(np.nan, index = df.index, dtype = object)
+            return df[col].astype(object)
+
+        def features(df, suffix):
+            types = column(df, "type" + suffix).fillna("").astype(str).str.split()
+            label = column(df, "label" + suffix)
+            key = label.where(label.notnull(), column(df, "calculation" + suffix))
+            return {
+                "name": df["name"].to_numpy(),
+                "base_type": types.str[0].fillna("").to_numpy(),
+                "list_name": types.str[1].fillna("").to_numpy(),
+                "key": np.array([process_label(k) if isinstance(k, str) else "" for k in key], dtype = object),
+                "expressions": [column(df, col + suffix).to_numpy(dtype = object) for col in ["relevant", "calculation", "constraint"]]
+            }
+
+        cur, ref = features(added, "_x"), features(removed, "_y")
+
+        # Inverted index of the removed questions: (base type, n-gram) -> positions
+        index = {}
+        for j, (base_type, key) in enumerate(zip(ref["base_type"], ref["key"])):
+            for gram in char_ngrams(key):
+                index.setdefault((base_type, gram), []).append(j)
+
+        cur_pos, ref_pos = [], []
+        for i, (base_type, key) in enumerate(zip(cur["base_type"], cur["key"])):
+            counts = Counter()
+            for gram in char_ngrams(key):
+                counts.update(index.get((base_type, gram), ()))
+            for j, _ in counts.most_common(top_k):
+                cur_pos.append(i)
+                ref_pos.append(j)
+
+        if len(cur_pos) == 0:
+            return None
+
+        cur_pos, ref_pos = np.array(cur_pos), np.array(ref_pos)
+        label_sim = 1 - Form.get_normalized_edit_distances(cur["key"][cur_pos], ref["key"][ref_pos])
+        expr_sim = np.zeros(len(cur_pos))
+        for x, y in zip(cur["expressions"], ref["expressions"]):
+            x, y = x[cur_pos], y[ref_pos]
+            # Two empty expressions are identical
+            both_null = pd.isnull(x) & pd.isnull(y)
+            expr_sim += np.where(both_null, 1.0, 1 - Form.get_normalized_edit_distances(x, y))
+        expr_sim /= len(cur["expressions"])
+        list_sim = (cur["list_name"][cur_pos] == ref["list_name"][ref_pos]).astype(float)
+        score = 0.7 * label_sim + 0.15 * expr_sim + 0.15 * list_sim
+
+        # One-to-one matching, best scores first
+        matches = []
+        used_cur, used_ref = set(), set()
+        for k in np.argsort(-score, kind = "stable"):
+            if score[k] < threshold:
+                break
+            i, j = cur_pos[k], ref_pos[k]
+            if (i in used_cur) or (j in used_ref):
+                continue
+            used_cur.add(i)
+            used_ref.add(j)
+            matches.append((cur["name"][i], ref["name"][j], round(score[k], 2)))
+
+        if len(matches) == 0:
+            return None
+
+        return pd.DataFrame(matches, columns = ["name", "likely_renamed_from", "rename_score"])
+
+    # Translations
+
+    def compareTranslations(self, f):
+
+        """Compare all translatable texts (label, hint, guidance_hint, constraint_message, required_message,
+        media) in every language for the questions present in both forms.
+
+        Both translation matrices are aligned on question name and (field, language) and compared as whole
+        arrays, so every language is compared in a single pass. Returns one row per question, field and
+        language with a status, a modification flag and the normalized edit distance (case-insensitive)."""
+
+        cur = self.translations
+        ref = f.translations
+
+        # Align both matrices on the shared questions and on the union of (field, language) columns
+        names = cur.index[cur.index.isin(ref.index)]
+        fields = self._survey_lang_columns
+        columns = sorted(set(cur.columns) | set(ref.columns),
+                         key = lambda c: (fields.index(c[0]) if c[0] in fields else len(fields), c[1]))
+        cur_values = cur.reindex(index = names, columns = columns).to_numpy(dtype = object)
+        ref_values = ref.reindex(index = names, columns = columns).to_numpy(dtype = object)
+
+        out = pd.DataFrame({
+            "name": np.repeat(names.to_numpy(dtype = object), len(columns)),
+            "field": np.tile([c[0] for c in columns], len(names)),
+            "language": np.tile([c[1] for c in columns], len(names)),
+            "current": cur_values.ravel(),
+            "reference": ref_values.ravel()
+        })
+        cur_null = out["current"].isnull()
+        ref_null = out["reference"].isnull()
+        out = out[~(cur_null & ref_null)].reset_index(drop = True)
+        cur_null = out["current"].isnull()
+        ref_null = out["reference"].isnull()
+
+        cur_text = out["current"].astype(str).str.lower()
+        ref_text = out["reference"].astype(str).str.lower()
+        out["edit_distance"] = 0.0
+        changed = ~cur_null & ~ref_null & (cur_text != ref_text)
+        out.loc[cur_null | ref_null, "edit_distance"] = 1.0
+        out.loc[changed, "edit_distance"] = [
+            round(d, 2) for d in Form.get_normalized_edit_distances(cur_text[changed], ref_text[changed])]
+        out["mod"] = (cur_null | ref_null | changed).astype(int)
+
+        out["status"] = "unchanged"
+        out.loc[changed, "status"] = "modified"
+        out.loc[ref_null, "status"] = "added"
+        out.loc[cur_null, "status"] = "removed"
+
+        return out[["name", "status", "field", "language", "mod", "edit_distance", "current", "reference"]]
+
     def detectModifiedLabels(self, f):
 
-        out = pd.merge(left = self._questions.rename(columns = {self._label: "label"}),
+        out = pd.merge(left = self.questions.rename(columns = {self._label: "label"}),
                        right = f.questions.rename(columns = {f.main_label: "label"}),
                        on = "name",
                        how = 'inner')
-        out["edit_distance"] = out.apply(lambda row: Form.get_normalized_edit_distance(s1 = row["label_x"], s2 = row["label_y"]), axis = 1)
+        out["edit_distance"] = Form.get_normalized_edit_distances(out["label_x"], out["label_y"])
 
         # Major modifications
         major = out[(out["label_x"].notnull()) & (out["edit_distance"] > 0.2)]
@@ -876,11 +2057,11 @@ class Form:
     
     def detectModifiedTypes(self, f):
 
-        out = pd.merge(left = self._questions.rename(columns = {self._label: "label"}),
+        out = pd.merge(left = self.questions.rename(columns = {self._label: "label"}),
                        right = f.questions.rename(columns = {f.main_label: "label"}),
                        on = "name",
                        how = 'inner')
-        out["edit_distance"] = out.apply(lambda row: Form.get_normalized_edit_distance(s1 = row["type_x"], s2 = row["type_y"]), axis = 1)
+        out["edit_distance"] = Form.get_normalized_edit_distances(out["type_x"], out["type_y"])
 
         out = out[(out["type_x"].notnull()) & (out["edit_distance"] > 0)]
         out = out.reset_index(drop = True)
@@ -899,34 +2080,16 @@ class Form:
 
         return out
     
-    def detectSimilarLabels(self, f):
-            
-        tmp1 = self._questions.copy(deep=True).rename(columns = {self._label: "label"})
-        tmp1 = tmp1[tmp1["label"].notnull()]
-
-        tmp2 = f.questions.rename(columns = {f.main_label: "label"})
-        tmp2 = tmp2[tmp2["label"].notnull()]
-
-        out = skrub.fuzzy_join(tmp1[["index", "name", "label", "type"]],
-                               tmp2[["index", "name", "label", "type"]],
-                               on='label',
-                               how='left',
-                               match_score=0,
-                               return_score=True)
-        out = out[out["matching_score"] >= 0.6] \
-               .rename(columns = {"index_x": "row1",
-                                  "index_y": "row2",
-                                  "name_x": "name1",
-                                  "name_y": "name2",
-                                  "type_x": "type1",
-                                  "type_y": "type2",
-                                  "label_x": "label1",
-                                  "label_y": "label2"}) \
-              .reset_index(drop=True) \
-              .sort_values(by=["matching_score", "row1"],
-                           ascending=[False, True])
-            
-        if (out.shape[0] == 0):
-            out = None
+    def detectSimilarLabels(self, f, index = None, k = 1, threshold = 0.6):
+
+        """Detect labels of this form that are similar to labels of the reference form.
+
+        param (Form): f reference form
+        param (LabelIndex): index optional index of the reference labels, f.label_index is used otherwise
+        param (int): k maximum number of reference labels matched per label
+        param (float): threshold minimum similarity score"""
+
+        if index is None:
+            index = f.label_index
 
-        return out
\ No newline at end of file
+        return index.match(self, k = k, threshold = threshold)
@@ -0,0 +1,148 @@
+import Form as form
+import FormComparator as comp
+import pandas as pd
+import numpy as np
+import os
+
+class FormChain:
+
+    def __init__(self, xlsx_list, output_dir = ".", engine = None, cache_dir = None, multi_language = False, labels = None):
+
+        """
+        Compares an ordered list of versions of a form, e.g. 2014 -> 2016 -> 2022.
+
+        Every form is parsed exactly once and compared with the previous version only (one `FormComparator`,
+        and one output file, per consecutive pair). The consecutive question comparisons are then composed
+        into a lineage table giving the status of every question in every version, and its cumulative status
+        from the first to the last version, without any additional pairwise comparison.
+
+        :param xlsx_list:
+            Paths to the XLSX forms (or Form objects), from the oldest to the most recent version.
+        :type xlsx_list: list
+
+        :param output_dir:
+            The directory where the consecutive comparisons are saved.
+        :type output_dir: str, optional
+
+        :param labels:
+            Names of the versions in the lineage table, by default the form versions.
+        :type labels: list, optional
+
+        The engine, cache_dir and multi_language parameters are passed to `Form.load` and `FormComparator`.
+
+        :example:
+            >>> chain = FormChain(["va2014.xlsx", "va2016.xlsx", "va2022.xlsx"], output_dir = "results/")
+            >>> chain.lineage[chain.lineage["status"] == "added"]
+        """
+
+        if len(xlsx_list) < 2:
+            raise ValueError("At least two versions are needed to build a chain")
+
+        self._forms = [x if isinstance(x, form.Form) else form.Form.load(x, cache_dir = cache_dir, engine = engine)
+                       for x in xlsx_list]
+        self._output_dir = output_dir
+        self._labels = FormChain.versionLabels(self._forms) if labels is None else list(labels)
+        if len(self._labels) != len(self._forms) or len(set(self._labels)) != len(self._labels):
+            raise ValueError("Version labels must be unique, one per form")
+
+        self._comparisons = [comp.FormComparator(cur_form, ref_form, output_dir = output_dir, multi_language = multi_language)
+                             for ref_form, cur_form in zip(self._forms[:-1], self._forms[1:])]
+        self._lineage_df = self.composeLineage()
+
+    @staticmethod
+    def versionLabels(forms):
+
+        """Label every form with its version (or file name if it has none), made unique with its position."""
+
+        labels = [str(f.version) if f.version is not None else f.file_name for f in forms]
+        if len(set(labels)) != len(labels):
+            labels = ["{}#{}".format(i + 1, label) for i, label in enumerate(labels)]
+        return labels
+
+    def composeLineage(self):
+
+        """Compose the consecutive question comparisons into a lineage table.
+
+        The table has one row per question name seen in any version, and one column per version with the
+        status of the question in that version compared to the previous one: unchanged, modified, added,
+        removed, not_compared if it has no label in one of them, or empty if absent from both. The first
+        version is flagged "present". The status column gives the cumulative status from the first to the
+        last version: unchanged, modified (in any intermediate version), added, removed, readded (in the
+        first and last versions, but removed in between) or transient (added and removed again), and the
+        introduced_in, last_modified_in and removed_in columns give the version of the last such change."""
+
+        statuses = [cmp.survey_questions.drop_duplicates(subset = "name").set_index("name")["status"]
+                    for cmp in self._comparisons]
+        form_names = [set(f.questions["name"].dropna()) for f in self._forms]
+        names = pd.Index(pd.concat([s.index.to_series() for s in statuses] +
+                                   [f.questions["name"] for f in self._forms]).dropna().unique(), name = "name")
+        steps = pd.DataFrame({label: s.reindex(names) for label, s in zip(self._labels[1:], statuses)}, index = names)
+
+        # Presence is taken from the forms, as questions without label in one version are not compared
+        present = {label: names.isin(f_names) for label, f_names in zip(self._labels, form_names)}
+        for prev_label, label in zip(self._labels[:-1], self._labels[1:]):
+            steps.loc[present[prev_label] & present[label] & steps[label].isnull().to_numpy(), label] = "not_compared"
+        in_first, in_last = present[self._labels[0]], present[self._labels[-1]]
+
+        lineage = pd.DataFrame({self._labels[0]: np.where(in_first, "present", None)}, index = names)
+        lineage = pd.concat([lineage, steps], axis = 1)
+
+        in_all = np.logical_and.reduce(list(present.values()))
+
+        modified = steps.apply(lambda col: col.str.contains("modified", na = False))
+        lineage["status"] = np.select(
+            [in_all & modified.any(axis = 1).to_numpy(),
+             in_all,
+             in_first & in_last,
+             ~in_first & in_last,
+             in_first & ~in_last],
+            ["modified", "unchanged", "readded", "added", "removed"],
+            default = "transient")
+
+        def last_version(mask):
+            # Label of the last version where mask is True, None if never
+            values = mask.to_numpy()
+            last = values.shape[1] - 1 - np.argmax(values[:, ::-1], axis = 1)
+            return np.where(values.any(axis = 1), np.array(mask.columns, dtype = object)[last], None)
+
+        lineage["introduced_in"] = last_version(steps == "added")
+        lineage["last_modified_in"] = last_version(modified)
+        lineage["removed_in"] = last_version(steps == "removed")
+
+        return lineage.reset_index()
+
+    def to_excel(self, output_xlsx = None):
+
+        """Write the lineage table to an Excel file and return its path.
+
+        The default file name is <form_id>#<first_version>~<last_version>.xlsx in the output directory."""
+
+        if output_xlsx is None:
+            output_xlsx = os.path.join(self._output_dir, "{}#{}~{}.xlsx".format(
+                self._forms[-1].id, self._labels[0], self._labels[-1]))
+        os.makedirs(os.path.dirname(output_xlsx) or ".", exist_ok = True)
+
+        with pd.ExcelWriter(output_xlsx, engine = "xlsxwriter") as writer:
+            self._lineage_df.to_excel(writer, sheet_name = "🧬 lineage", index = False)
+            worksheet = writer.sheets["🧬 lineage"]
+            worksheet.freeze_panes(1, 1)
+            for idx, col in enumerate(self._lineage_df.columns):
+                max_length = min(max(self._lineage_df[col].astype(str).map(len).max(), len(str(col))), 50)
+                worksheet.set_column(idx, idx, max_length + 2)
+        return output_xlsx
+
+    @property
+    def forms(self):
+        return self._forms
+
+    @property
+    def labels(self):
+        return self._labels
+
+    @property
+    def comparisons(self):
+        return self._comparisons
+
+    @property
+    def lineage(self):
+        return self._lineage_df
@@ -1,10 +1,46 @@
 import Form as form
 import pandas as pd
 import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Reference form of compare_many, set once in every worker process
+_reference_form = None
+
+def _init_worker(reference_form):
+    global _reference_form
+    _reference_form = reference_form
+
+def _claim_output_name(claims_dir, output_xlsx):
+
+    """Return output_xlsx, or output_xlsx with a ~2, ~3, ... suffix if another comparison of the same run already
+    claimed it. Names are claimed by creating an empty file in claims_dir, which is atomic across processes."""
+
+    stem, ext = os.path.splitext(output_xlsx)
+    k = 1
+    while True:
+        name = output_xlsx if k == 1 else "{}~{}{}".format(stem, k, ext)
+        try:
+            os.close(os.open(os.path.join(claims_dir, name), os.O_CREAT | os.O_EXCL))
+            return name
+        except FileExistsError:
+            k += 1
+
+def _compare_to_reference(cur_xlsx, output_dir, options, claims_dir, ref_form = None):
+    ref_form = _reference_form if ref_form is None else ref_form
+    cur_form = FormComparator.loadForm(cur_xlsx, engine = options["engine"], cache_dir = options["cache_dir"],
+                                       choices_chunksize = options["choices_chunksize"])
+    output_xlsx = FormComparator.outputName(cur_form, ref_form)
+    claimed = _claim_output_name(claims_dir, output_xlsx)
+    if claimed != output_xlsx:
+        print(f"\t - ⚠️ {output_xlsx} is already written by another form of this run, results stored in {claimed}")
+    return FormComparator(cur_form, ref_form, output_dir = output_dir, output_xlsx = claimed, **options).output_path
 
 class FormComparator:
 
-    def __init__(self, cur_xlsx, ref_xlsx, output_dir = "."):
+    def __init__(self, cur_xlsx, ref_xlsx, output_dir = ".", engine = None, cache_dir = None, multi_language = False,
+                 choices_chunksize = None, previous = None, output_xlsx = None):
 
         """
         Initializes the XLSComparator class for comparing two XLSX forms.
@@ -14,18 +50,49 @@ class FormComparator:
         versions, and ensures the specified output directory exists.
 
         :param cur_xlsx: 
-            Path to the current XLSX form to be compared.
-        :type cur_xlsx: str
+            Path to the current XLSX form to be compared, or an already created Form object.
+        :type cur_xlsx: str or Form
 
         :param ref_xlsx: 
-            Path to the reference XLSX form to compare against.
-        :type ref_xlsx: str
+            Path to the reference XLSX form to compare against, or an already created Form object.
+        :type ref_xlsx: str or Form
 
         :param output_dir: 
             The directory where the comparison results will be saved. 
             By default, the results are saved in the current directory ("./").
         :type output_dir: str, optional
 
+        :param engine: 
+            The pandas Excel engine used to read both forms, e.g. "openpyxl" (default) or "calamine".
+        :type engine: str, optional
+
+        :param cache_dir: 
+            Optional directory of parsed forms. Forms whose content was already parsed are loaded from 
+            the cache instead of being re-parsed (see `Form.load`).
+        :type cache_dir: str, optional
+
+        :param multi_language: 
+            If True, also compare the labels, hints, guidance hints, constraint and required messages and 
+            media of every language and add them to a "🌐 translations" sheet.
+        :type multi_language: bool, optional
+
+        :param choices_chunksize: 
+            If set, the choices sheets are compared in streaming mode, reading chunks of this many rows 
+            (see `Form.streamCompareChoices`). Forms given as paths are then created without loading their 
+            choices sheet, and without the cache. This bounds peak memory for very large choices sheets; 
+            the choices sheet of the output then only holds the list name, name, status and label columns.
+        :type choices_chunksize: int, optional
+
+        :param previous: 
+            An earlier comparison of versions of the same forms, e.g. before the last edits of the current form. 
+            Only the questions and choice lists whose content fingerprints changed in either form since then 
+            are compared again, the other rows are reused from the previous results.
+        :type previous: FormComparator, optional
+
+        :param output_xlsx: 
+            Name of the output file, by default built from the form IDs and versions (see `outputName`).
+        :type output_xlsx: str, optional
+
         :raises FileNotFoundError: 
             If the specified XLSX files are not found.
 
@@ -37,12 +104,27 @@ class FormComparator:
             `<current_form_id>#<current_form_version>!<ref_form_id>#<ref_form_version>.xlsx`
         """
 
-        # Initialize form objects
-        cur_form = form.Form(cur_xlsx)
-        ref_form = form.Form(ref_xlsx)
+        # Choices can only be streamed from files
+        sources = [x.source if isinstance(x, form.Form) else x for x in [cur_xlsx, ref_xlsx]]
+        if choices_chunksize and None in sources:
+            print("\t - ⚠️ Forms read from memory cannot be streamed, comparing choices in memory")
+            choices_chunksize = None
+
+        # Initialize form objects, without loading the choices sheets when they are streamed
+        cur_form = FormComparator.loadForm(cur_xlsx, engine = engine, cache_dir = cache_dir, choices_chunksize = choices_chunksize)
+        ref_form = FormComparator.loadForm(ref_xlsx, engine = engine, cache_dir = cache_dir, choices_chunksize = choices_chunksize)
+
+        if not choices_chunksize:
+            streamed = [f.file_name for f in [cur_form, ref_form] if f.choices is None and f.list_names]
+            if streamed:
+                raise ValueError(f"The choices of {', '.join(streamed)} were not loaded (see choices_chunksize) and cannot "
+                                 "be compared in memory: pass the paths of both forms to stream their choices")
+
+        self._cur_form = cur_form
+        self._ref_form = ref_form
 
         # Construct output filename based on form IDs and versions
-        output_xlsx = "{}#{}!{}#{}.xlsx".format(cur_form.id, cur_form.version, ref_form.id, ref_form.version)
+        output_xlsx = output_xlsx or FormComparator.outputName(cur_form, ref_form)
 
         # Handle output directory creation
         if output_dir != ".":
@@ -54,13 +136,37 @@ class FormComparator:
         # Notify the user about the output path
         print ("📝 Compare forms and store results in " + self._output_path)
 
+        # Sheets with the same content are not compared again, see Form.sameSheet
+        identical = [sheet for sheet in ["survey", "choices", "settings"] if cur_form.sameSheet(ref_form, sheet)]
+        if identical:
+            print("\t - ℹ️ identical " + ", ".join(identical) + " sheet(s)")
+
+        # Content fingerprints of the compared rows, used by later incremental comparisons
+        self._question_fingerprints                   = (cur_form.question_fingerprints, ref_form.question_fingerprints)
+        self._choices_streamed                        = bool(choices_chunksize)
+        self._list_fingerprints                       = None if self._choices_streamed else \
+            (cur_form.list_fingerprints, ref_form.list_fingerprints)
+        previous_questions = None if previous is None else (previous.survey_questions,) + previous._question_fingerprints
+        previous_choices = None if (previous is None) or previous._choices_streamed or self._choices_streamed else \
+            (previous.choices,) + previous._list_fingerprints
+
         self._settings_df                             = cur_form.compareSettings(ref_form)
         self._survey_columns_df                       = cur_form.compareColumns(ref_form, "survey")
         self._group_repeat_names_df                   = cur_form.compareGroupRepeatNames(ref_form)
         self._list_name_df                            = cur_form.compareListNames(ref_form)
-        self._choices_df                              = cur_form.compareChoices(ref_form)
+        if choices_chunksize:
+            chunks = list(form.Form.streamCompareChoices(cur_form.source, ref_form.source, chunksize = choices_chunksize,
+                                                         cur_label = cur_form.main_label, ref_label = ref_form.main_label))
+            # An empty choices sheet yields no chunk
+            chunks = chunks or [pd.DataFrame(columns = ["list_name", "name", "status", "current_label", "reference_label"])]
+            self._choices_df                          = pd.concat(chunks) \
+                .sort_values(by=["list_name", "name"], ascending=[True, True], key = lambda x: x.str.lower())
+        else:
+            self._choices_df                          = cur_form.compareChoices(ref_form, list_name_df = self._list_name_df,
+                                                                        previous = previous_choices)
         self._choices_columns_df                      = cur_form.compareColumns(ref_form, "choices")
-        self._survey_questions_df                     = cur_form.compareQuestions(ref_form)
+        self._survey_questions_df                     = cur_form.compareQuestions(ref_form, previous = previous_questions)
+        self._translations_df                         = cur_form.compareTranslations(ref_form) if multi_language else None
 
         # Generate summary DataFrame
         self._generic_df = pd.DataFrame({
@@ -108,6 +214,17 @@ class FormComparator:
         self._generic_df["Total"] = self._generic_df[["Unchanged", "Added", "Deleted", "Modified"]] \
             .apply(lambda col: pd.to_numeric(col, errors='coerce').fillna(0).astype(int)).sum(axis=1)
 
+        if self._translations_df is not None:
+            counts = self._translations_df["status"].value_counts()
+            translations_row = pd.DataFrame({
+                "Comparison Type": ['=HYPERLINK("#\'🌐 translations\'!A1", "🌐 Translations")'],
+                "Unchanged": [counts.get("unchanged", 0)],
+                "Added": [counts.get("added", 0)],
+                "Deleted": [counts.get("removed", 0)],
+                "Modified": [counts.get("modified", 0)],
+                "Total": [len(self._translations_df)]})
+            self._generic_df = pd.concat([self._generic_df, translations_row], ignore_index = True)
+
         # List of sheets and corresponding DataFrame
         sds = [
             ("👁️ overview", self._generic_df),
@@ -118,6 +235,8 @@ class FormComparator:
             ("📋 choices columns", self._choices_columns_df),
             ("⚙️ settings", self._settings_df)
         ]
+        if self._translations_df is not None:
+            sds.insert(4, ("🌐 translations", self._translations_df))
 
         sds_color = [
             ("📋 survey columns", self._survey_columns_df, 1),
@@ -127,6 +246,8 @@ class FormComparator:
             ("📋 survey questions", self._survey_questions_df, 2),
             ("⚙️ settings", self._settings_df, 1)
         ]
+        if self._translations_df is not None:
+            sds_color.append(("🌐 translations", self._translations_df, 1))
 
         overview_color = "#F7DC6F"
         choices_color = "#C6EFCE"
@@ -141,6 +262,8 @@ class FormComparator:
             ("📋 choices columns", choices_color),
             ("⚙️ settings", settings_color)
         ]
+        if self._translations_df is not None:
+            slbls_color.append(("🌐 translations", survey_color))
 
         # Write output file
         with pd.ExcelWriter(self._output_path, engine="xlsxwriter") as writer:
@@ -199,10 +322,127 @@ class FormComparator:
                 if cell_value.startswith('=HYPERLINK('):
                     writer.sheets["👁️ overview"].write_formula(row, 0, cell_value, hyperlink_format)
 
+    @staticmethod
+    def loadForm(x, engine = None, cache_dir = None, choices_chunksize = None):
+
+        """Return x if it is a Form object, otherwise create the Form of the XLSX file x.
+
+        With choices_chunksize, the choices sheet is not loaded (see Form), and the cache is not used."""
+
+        if isinstance(x, form.Form):
+            return x
+        if choices_chunksize:
+            return form.Form(x, engine = engine, choices_chunksize = choices_chunksize)
+        return form.Form.load(x, cache_dir = cache_dir, engine = engine)
+
+    @staticmethod
+    def outputName(cur_form, ref_form):
+
+        """Default output file name: <current_form_id>#<current_form_version>!<ref_form_id>#<ref_form_version>.xlsx"""
+
+        return "{}#{}!{}#{}.xlsx".format(cur_form.id, cur_form.version, ref_form.id, ref_form.version)
+
+    @staticmethod
+    def compare_many(ref_xlsx, cur_xlsx_list, output_dir = ".", workers = None, engine = None, cache_dir = None,
+                     multi_language = False, choices_chunksize = None):
+
+        """
+        Compares several current forms against one reference form, in parallel.
+
+        The reference form is parsed once in the calling process and sent once to every worker process 
+        of the pool, where one comparison per current form is run. Results are yielded as the comparisons 
+        finish, which is not necessarily in the order of cur_xlsx_list. A comparison that fails (e.g. an 
+        unreadable current form) yields its exception instead of an output path, and the other comparisons 
+        go on. Current forms sharing the same form ID and version get distinct output files, suffixed ~2, ~3, ...
+
+        :param ref_xlsx: 
+            Path to the reference XLSX form, or an already created Form object.
+        :type ref_xlsx: str or Form
+
+        :param cur_xlsx_list: 
+            Paths to the current XLSX forms (or Form objects) to compare against the reference form.
+        :type cur_xlsx_list: list
+
+        :param workers: 
+            Number of worker processes, by default the number of processors. With 1, the comparisons 
+            are run one after the other in the calling process.
+        :type workers: int, optional
+
+        The other parameters are passed to every `FormComparator`. With choices_chunksize, the reference form 
+        must be read from a file (a path, or a Form created from a path), as its choices are streamed from it.
+
+        :return: 
+            A generator of (cur_xlsx, output_path) tuples, or (cur_xlsx, exception) for failed comparisons.
+
+        :example:
+            >>> for cur_xlsx, output_path in FormComparator.compare_many("master.xlsx", ["a.xlsx", "b.xlsx"], "results/", workers = 4):
+            ...     if isinstance(output_path, Exception):
+            ...         print(cur_xlsx, "failed:", output_path)
+        """
+
+        ref_form = ref_xlsx if isinstance(ref_xlsx, form.Form) else form.Form.load(ref_xlsx, cache_dir = cache_dir, engine = engine)
+        # Choices are streamed from both files, the streamed current forms could not be compared in memory
+        if choices_chunksize and ref_form.source is None:
+            raise ValueError("choices_chunksize needs a reference form read from a file, "
+                             f"{ref_form.file_name} was read from memory")
+        if ref_form.choices is None and ref_form.list_names and not choices_chunksize:
+            raise ValueError(f"The choices of the reference form {ref_form.file_name} were not loaded (see choices_chunksize)")
+        # Build the lazily parsed parts before the form is sent, so that workers do not parse them again
+        ref_form.questions
+        ref_form.sheet_digests
+        options = {"engine": engine, "cache_dir": cache_dir, "multi_language": multi_language,
+                   "choices_chunksize": choices_chunksize}
+
+        # Output names claimed by the comparisons of this run
+        claims_dir = tempfile.mkdtemp(prefix = "compare_many_")
+        try:
+            if workers == 1:
+                for cur_xlsx in cur_xlsx_list:
+                    try:
+                        result = _compare_to_reference(cur_xlsx, output_dir, options, claims_dir, ref_form)
+                    except Exception as e:
+                        print(f"\t - ⚠️ Comparison of {cur_xlsx} failed: {e!r}")
+                        result = e
+                    yield cur_xlsx, result
+                return
+
+            with ProcessPoolExecutor(max_workers = workers, initializer = _init_worker, initargs = (ref_form,)) as executor:
+                futures = {executor.submit(_compare_to_reference, cur_xlsx, output_dir, options, claims_dir): cur_xlsx
+                           for cur_xlsx in cur_xlsx_list}
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"\t - ⚠️ Comparison of {futures[future]} failed: {e!r}")
+                        result = e
+                    yield futures[future], result
+        finally:
+            shutil.rmtree(claims_dir, ignore_errors = True)
+
     @property
     def output_path(self):
         return self._output_path
 
+    @property
+    def overview(self):
+        return self._generic_df
+
+    @property
+    def current_form(self):
+        return self._cur_form
+
+    @property
+    def reference_form(self):
+        return self._ref_form
+
+    @property
+    def survey_questions(self):
+        return self._survey_questions_df
+
+    @property
+    def choices(self):
+        return self._choices_df
+
 def apply_color_format(worksheet, df, green_format, red_format, orange_format, j = 1):
 
     for row in range(1, len(df) + 1):  # Skip header row
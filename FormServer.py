@@ -0,0 +1,288 @@
+"""Local HTTP service comparing XLSForms, keeping parsed forms in memory between requests.
+
+Endpoints (JSON responses):
+    GET  /health             status and cache statistics
+    GET  /forms              forms held in the cache
+    POST /forms?name=a.xlsx  upload an XLSForm (raw workbook bytes as the request body), returns its sha256
+    POST /compare            JSON body {"cur": ..., "ref": ..., "multi_language": false}, where cur and ref are
+                             either the sha256 of an uploaded form or the path of an XLSForm on this machine;
+                             returns the output path and the overview of the comparison
+
+Usage:
+    python FormServer.py --port 8765 --max-memory-mb 1024 --output-dir outputs
+
+Only the Python standard library is used for the server. It is meant to run locally (it reads and writes
+files on the machine) and listens on 127.0.0.1 by default.
+"""
+
+import Form as form
+import FormComparator as comp
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+
+class FormCache:
+
+    """Least recently used cache of parsed Form objects, keyed by the SHA-256 of the workbook content.
+
+    The memory used by the cached forms (see Form.memory_usage, which includes their derived frames, label
+    index, common words and sheet digests) is kept under max_bytes by evicting the least recently used forms.
+    The most recently used form is always kept, even if it is larger. The cap is approximate: the size of
+    Python objects is estimated, and the canonical XPath expressions shared by all forms are not counted
+    (that cache is bounded separately, see XPathExpression.cache_size)."""
+
+    def __init__(self, max_bytes = 512 * 1024 * 1024):
+        self._forms = OrderedDict()
+        self._sizes = {}
+        self._max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sha):
+        f = self._forms.get(sha)
+        if f is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._forms.move_to_end(sha)
+        return f
+
+    def put(self, sha, f):
+        self._forms[sha] = f
+        self._forms.move_to_end(sha)
+        self.update(sha)
+
+    def update(self, sha):
+        """Measure a form again (lazily built frames grow it) and evict forms over the memory cap."""
+        if sha in self._forms:
+            self._sizes[sha] = int(self._forms[sha].memory_usage().sum())
+        while len(self._forms) > 1 and self.total_bytes > self._max_bytes:
+            evicted, _ = self._forms.popitem(last = False)
+            self._sizes.pop(evicted, None)
+
+    @property
+    def total_bytes(self):
+        return sum(self._sizes.values())
+
+    def __contains__(self, sha):
+        return sha in self._forms
+
+    def __len__(self):
+        return len(self._forms)
+
+    def describe(self):
+        return [{"sha256": sha, "file_name": f.file_name, "id": f.id, "version": f.version, "bytes": self._sizes.get(sha)}
+                for sha, f in self._forms.items()]
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+_reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+class FormServer:
+
+    def __init__(self, output_dir = ".", max_bytes = 512 * 1024 * 1024, engine = None, max_upload_bytes = 100 * 1024 * 1024):
+
+        """
+        Serves form comparisons over HTTP from a long-running process.
+
+        Parsed forms are kept in a FormCache, so that comparing again against the same master form does not
+        import or parse anything. Parsing and comparisons run in the default executor of the event loop (a
+        thread pool), so that a long comparison does not block other requests, and concurrent requests for
+        the same new form only parse it once. Comparisons writing the same output file run one at a time.
+
+        :param output_dir: directory where the comparison files are written.
+        :param max_bytes: memory cap of the cache of parsed forms, in bytes.
+        :param engine: pandas Excel engine used to read forms, e.g. "calamine".
+        :param max_upload_bytes: maximum size of an uploaded form.
+        """
+
+        self._output_dir = output_dir
+        self._cache = FormCache(max_bytes)
+        self._engine = engine
+        self._max_upload_bytes = max_upload_bytes
+        self._parsing = {}
+        # Output path -> [asyncio.Lock, number of comparisons using it]
+        self._writing = {}
+
+    @property
+    def cache(self):
+        return self._cache
+
+    async def form(self, sha, build):
+
+        """Return the cached form with this sha, parsing it with build() in the executor on a miss."""
+
+        f = self._cache.get(sha)
+        if f is not None:
+            return f
+        if sha not in self._parsing:
+            def parse():
+                f = build()
+                # Build the lazily parsed parts while still in the executor
+                f.questions
+                f.sheet_digests
+                return f
+            self._parsing[sha] = asyncio.get_running_loop().run_in_executor(None, parse)
+        try:
+            f = await self._parsing[sha]
+        finally:
+            self._parsing.pop(sha, None)
+        if sha not in self._cache:
+            self._cache.put(sha, f)
+        return f
+
+    async def resolve(self, key):
+
+        """Return (sha, Form) for the sha256 of an uploaded form or the path of an XLSForm."""
+
+        if not isinstance(key, str) or not key:
+            raise HTTPError(400, "cur and ref must be the sha256 of an uploaded form or a path")
+        if key in self._cache:
+            return key, self._cache.get(key)
+        if not os.path.exists(key):
+            raise HTTPError(404, f"Unknown form {key}")
+        loop = asyncio.get_running_loop()
+        sha = await loop.run_in_executor(None, form.file_sha256, key)
+        return sha, await self.parse(sha, key, lambda: form.Form(key, engine = self._engine))
+
+    async def parse(self, sha, name, build):
+
+        """Return self.form(sha, build), answering 400 Bad Request if the content is not a readable XLSForm."""
+
+        try:
+            return await self.form(sha, build)
+        except Exception as e:
+            raise HTTPError(400, f"Cannot read {name} as an XLSForm: {type(e).__name__}: {e}")
+
+    async def upload(self, query, body):
+        if len(body) == 0:
+            raise HTTPError(400, "Empty upload")
+        sha = hashlib.sha256(body).hexdigest()
+        name = query.get("name", ["upload.xlsx"])[0]
+        f = await self.parse(sha, name, lambda: form.Form.from_bytes(body, name = name, engine = self._engine))
+        return {"sha256": sha, "file_name": f.file_name, "id": f.id, "version": f.version}
+
+    async def compare(self, body):
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "The request body must be JSON")
+        cur_sha, cur_form = await self.resolve(request.get("cur"))
+        ref_sha, ref_form = await self.resolve(request.get("ref"))
+        multi_language = bool(request.get("multi_language", False))
+
+        output_xlsx = comp.FormComparator.outputName(cur_form, ref_form)
+        def run():
+            return comp.FormComparator(cur_form, ref_form, output_dir = self._output_dir, output_xlsx = output_xlsx,
+                                       multi_language = multi_language)
+
+        # Concurrent comparisons of the same forms would write the same workbook at the same time
+        path = os.path.abspath(os.path.join(self._output_dir, output_xlsx))
+        writing = self._writing.setdefault(path, [asyncio.Lock(), 0])
+        writing[1] += 1
+        try:
+            async with writing[0]:
+                result = await asyncio.get_running_loop().run_in_executor(None, run)
+        finally:
+            writing[1] -= 1
+            if writing[1] == 0:
+                del self._writing[path]
+
+        # Comparisons build derived frames, so the forms are measured again
+        self._cache.update(cur_sha)
+        self._cache.update(ref_sha)
+        overview = result.overview.assign(**{"Comparison Type": result.overview["Comparison Type"]
+                                                .str.extract(r'"([^"]*)"\)$', expand = False)})
+        return {"cur": cur_sha, "ref": ref_sha, "output_path": os.path.abspath(result.output_path),
+                "overview": json.loads(overview.to_json(orient = "records"))}
+
+    def health(self):
+        return {"status": "ok", "version": form.__version__, "forms": len(self._cache),
+                "bytes": self._cache.total_bytes, "hits": self._cache.hits, "misses": self._cache.misses}
+
+    async def route(self, method, target, body):
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if url.path == "/health" and method == "GET":
+            return self.health()
+        if url.path == "/forms" and method == "GET":
+            return self._cache.describe()
+        if url.path == "/forms" and method == "POST":
+            return await self.upload(query, body)
+        if url.path == "/compare" and method == "POST":
+            return await self.compare(body)
+        if url.path in ("/health", "/forms", "/compare"):
+            raise HTTPError(405, f"{method} is not allowed on {url.path}")
+        raise HTTPError(404, f"Unknown path {url.path}")
+
+    async def handle(self, reader, writer):
+
+        """Read one HTTP/1.1 request, answer it with JSON and close the connection."""
+
+        try:
+            status, payload = 200, None
+            try:
+                request_line = (await reader.readline()).decode("latin-1").split()
+                if len(request_line) != 3:
+                    raise HTTPError(400, "Malformed request line")
+                method, target, _ = request_line
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode("latin-1")
+                    if line in ("\r\n", "\n", ""):
+                        break
+                    key, _, value = line.partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0) or 0)
+                if length > self._max_upload_bytes:
+                    raise HTTPError(413, f"Request body larger than {self._max_upload_bytes} bytes")
+                body = await reader.readexactly(length) if length else b""
+                payload = await self.route(method.upper(), target, body)
+            except HTTPError as e:
+                status, payload = e.status, {"error": str(e)}
+            except (ValueError, asyncio.IncompleteReadError) as e:
+                status, payload = 400, {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+            data = json.dumps(payload, default = str).encode("utf-8")
+            writer.write(f"HTTP/1.1 {status} {_reasons.get(status, '')}\r\n"
+                         f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                         f"Connection: close\r\n\r\n".encode("latin-1") + data)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host = "127.0.0.1", port = 8765):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"📝 Serve form comparisons on http://{host}:{port}, results stored in {self._output_dir}")
+        async with server:
+            await server.serve_forever()
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description = "Serve XLSForm comparisons over HTTP, keeping parsed forms in memory.")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8765)
+    parser.add_argument("--output-dir", default = ".", help = "directory where comparison files are written")
+    parser.add_argument("--max-memory-mb", type = float, default = 512, help = "memory cap of the parsed form cache")
+    parser.add_argument("--engine", default = None, help = "pandas Excel engine, e.g. calamine")
+    args = parser.parse_args(argv)
+
+    server = FormServer(output_dir = args.output_dir, max_bytes = int(args.max_memory_mb * 1024 * 1024), engine = args.engine)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
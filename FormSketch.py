@@ -0,0 +1,187 @@
+import Form as form
+import pandas as pd
+import numpy as np
+import os
+
+class FormSketch:
+
+    """A MinHash sketch of a Form, to estimate how similar two forms are without comparing them.
+
+    The sketch is built from the set of question names, (name, type) pairs, list names and normalized
+    labels of the form. The fraction of equal MinHash values of two sketches estimates the Jaccard
+    similarity of their sets."""
+
+    # Random hash functions, shared by all sketches with the same number of permutations and seed
+    _permutations = {}
+
+    def __init__(self, f, num_perm = 128, seed = 1):
+
+        """Build the sketch of a form.
+
+        param (Form): f form to sketch
+        param (int): num_perm number of hash functions (length of the signature)
+        param (int): seed random seed of the hash functions, sketches can only be compared with the same seed"""
+
+        self._name = f.file_name
+        self._num_perm = num_perm
+        self._seed = seed
+        self._size = 0
+        self._signature = self.minhash(FormSketch.shingles(f))
+
+    @staticmethod
+    def shingles(f):
+
+        """Return the set of features of a form that are compared."""
+
+        questions = f.questions
+        features = set("name:" + str(name) for name in questions["name"].dropna())
+        features.update("type:{}|{}".format(name, " ".join(str(type_).split()))
+                        for name, type_ in zip(questions["name"], questions["type"]) if pd.notnull(type_))
+        features.update("list:" + str(list_name) for list_name in f.list_names)
+        features.update("label:" + str(form.process_label(label)) for label in questions[f.main_label].dropna())
+        return features
+
+    def minhash(self, features):
+
+        """Return the MinHash signature of a set of features, with multiply-add hashing on 64 bits."""
+
+        key = (self._num_perm, self._seed)
+        if key not in FormSketch._permutations:
+            rng = np.random.default_rng(self._seed)
+            a = rng.integers(1, np.iinfo(np.uint64).max, size = self._num_perm, dtype = np.uint64) | np.uint64(1)
+            b = rng.integers(0, np.iinfo(np.uint64).max, size = self._num_perm, dtype = np.uint64)
+            FormSketch._permutations[key] = (a, b)
+        a, b = FormSketch._permutations[key]
+
+        self._size = len(features)
+        if self._size == 0:
+            return np.full(self._num_perm, np.iinfo(np.uint64).max, dtype = np.uint64)
+        hashes = pd.util.hash_array(np.array(sorted(features), dtype = object))
+        # Products wrap around modulo 2^64, which is the intended hash family
+        with np.errstate(over = "ignore"):
+            return (a[:, None] * hashes[None, :] + b[:, None]).min(axis = 1)
+
+    def similarity(self, other):
+
+        """Estimated Jaccard similarity with another sketch."""
+
+        if (self._num_perm, self._seed) != (other._num_perm, other._seed):
+            raise ValueError("Sketches built with different parameters cannot be compared")
+        return float(np.mean(self._signature == other._signature))
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def signature(self):
+        return self._signature
+
+    @property
+    def size(self):
+        return self._size
+
+class FormSketchIndex:
+
+    def __init__(self, sketches, bands = 32, threshold = 0.5):
+
+        """
+        Groups forms by similarity using locality-sensitive hashing (LSH) of their MinHash sketches.
+
+        The signatures are cut into bands, and only forms sharing at least one identical band are
+        candidate pairs, so that the number of similarity estimates grows with the number of similar
+        forms rather than with the number of pairs. Candidate pairs with an estimated similarity of at
+        least threshold are linked, and the connected components form the clusters.
+
+        :param sketches: FormSketch objects built with the same parameters.
+        :type sketches: list
+
+        :param bands: number of LSH bands, must divide the signature length. More bands find less similar pairs.
+        :type bands: int, optional
+
+        :param threshold: minimum estimated similarity for two forms to be in the same cluster.
+        :type threshold: float, optional
+        """
+
+        self._sketches = list(sketches)
+        self._threshold = threshold
+        num_perm = self._sketches[0].signature.shape[0] if self._sketches else 0
+        if bands <= 0 or num_perm % bands != 0:
+            raise ValueError(f"The number of bands ({bands}) must divide the signature length ({num_perm})")
+        self._bands = bands
+
+        # Forms that share a band are candidates
+        rows = num_perm // bands
+        candidates = set()
+        for band in range(bands):
+            buckets = {}
+            for i, sketch in enumerate(self._sketches):
+                buckets.setdefault(sketch.signature[band * rows:(band + 1) * rows].tobytes(), []).append(i)
+            for members in buckets.values():
+                candidates.update((members[j], members[k]) for j in range(len(members)) for k in range(j + 1, len(members)))
+
+        self._pairs = pd.DataFrame(
+            [(i, j, self._sketches[i].similarity(self._sketches[j])) for i, j in sorted(candidates)],
+            columns = ["form1", "form2", "similarity"])
+
+    @classmethod
+    def from_folder(cls, folder, num_perm = 128, seed = 1, bands = 32, threshold = 0.5, engine = None, cache_dir = None):
+
+        """Sketch every XLSForm (.xlsx file) of a folder and index them."""
+
+        files = sorted(fn for fn in os.listdir(folder) if fn.endswith(".xlsx") and not fn.startswith("~$"))
+        sketches = [FormSketch(form.Form.load(os.path.join(folder, fn), cache_dir = cache_dir, engine = engine),
+                               num_perm = num_perm, seed = seed)
+                    for fn in files]
+        return cls(sketches, bands = bands, threshold = threshold)
+
+    @property
+    def names(self):
+        return [sketch.name for sketch in self._sketches]
+
+    @property
+    def pairs(self):
+        """Candidate pairs with their estimated similarity, with form names."""
+        names = np.array(self.names, dtype = object)
+        return self._pairs.assign(form1 = names[self._pairs["form1"].to_numpy(dtype = int)],
+                                  form2 = names[self._pairs["form2"].to_numpy(dtype = int)]) \
+                          .sort_values(by = "similarity", ascending = False) \
+                          .reset_index(drop = True)
+
+    def similarity_matrix(self):
+
+        """Return the approximate pairwise similarity matrix of the forms.
+
+        Pairs that are not LSH candidates are unlikely to be similar and are set to 0."""
+
+        n = len(self._sketches)
+        matrix = np.eye(n)
+        i, j = self._pairs["form1"].to_numpy(dtype = int), self._pairs["form2"].to_numpy(dtype = int)
+        matrix[i, j] = self._pairs["similarity"].to_numpy()
+        matrix[j, i] = self._pairs["similarity"].to_numpy()
+        return pd.DataFrame(matrix, index = self.names, columns = self.names)
+
+    def clusters(self):
+
+        """Return the cluster of every form (union-find over the candidate pairs above the threshold)."""
+
+        parent = list(range(len(self._sketches)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        linked = self._pairs[self._pairs["similarity"] >= self._threshold]
+        for i, j in zip(linked["form1"], linked["form2"]):
+            root_i, root_j = find(int(i)), find(int(j))
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        roots = [find(i) for i in range(len(self._sketches))]
+        # Number clusters in order of first appearance
+        numbers = {root: k for k, root in enumerate(dict.fromkeys(roots))}
+        return pd.DataFrame({"name": self.names,
+                             "cluster": [numbers[root] for root in roots],
+                             "features": [sketch.size for sketch in self._sketches]})
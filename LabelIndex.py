@@ -0,0 +1,152 @@
+import pandas as pd
+import numpy as np
+import pickle
+import Form as form
+
+class LabelIndex:
+
+    """A class to find similar question labels between a reference form and any number of current forms.
+
+    The labels of the reference form are normalized with process_label and vectorized once with a character
+    n-gram TF-IDF model. Labels of current forms are then projected on the same model, and the cosine
+    similarities with all reference labels are obtained with a single sparse matrix product, from which
+    the top k matches above a score threshold are kept.
+
+    The index can be saved to disk and loaded again, so that it is only built once per reference form:
+
+        index = LabelIndex.from_form(reference_form)
+        index.save("reference_labels.pkl")
+        ...
+        index = LabelIndex.load("reference_labels.pkl")
+        similar_df = index.match(current_form, k = 3, threshold = 0.6)"""
+
+    def __init__(self, questions, label_col = "label", ngram_range = (2, 4)):
+
+        """Build the index from a questions DataFrame.
+
+        param (DataFrame): questions questions of the reference form, with index, name and type columns
+        param (str): label_col name of the label column
+        param (tuple): ngram_range lower and upper bound of the character n-gram sizes"""
+
+        # scikit-learn is only needed to build or query an index
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        questions = questions[questions[label_col].notnull()]
+        self._questions = questions[["index", "name", label_col, "type"]] \
+            .rename(columns = {label_col: "label"}) \
+            .reset_index(drop = True)
+        self._vectorizer = TfidfVectorizer(analyzer = "char_wb", ngram_range = ngram_range, sublinear_tf = True)
+        self._matrix = self._vectorizer.fit_transform(LabelIndex.normalize(self._questions["label"]))
+
+    @classmethod
+    def from_form(cls, f, ngram_range = (2, 4)):
+
+        """Build the index from the questions of a Form object, on its main label."""
+
+        return cls(f.questions, label_col = f.main_label, ngram_range = ngram_range)
+
+    @staticmethod
+    def normalize(labels):
+
+        """Normalize labels with process_label before vectorization."""
+
+        return [str(form.process_label(s)) for s in labels]
+
+    @property
+    def questions(self):
+        return self._questions
+
+    def __len__(self):
+        return self._questions.shape[0]
+
+    def memory_usage(self):
+
+        """Return the approximate memory used by the index (questions, TF-IDF matrix and vocabulary), in bytes."""
+
+        matrix = self._matrix.data.nbytes + self._matrix.indices.nbytes + self._matrix.indptr.nbytes
+        return int(self._questions.memory_usage(index = True, deep = True).sum()) + matrix \
+            + self._vectorizer.idf_.nbytes + form.object_memory_usage(self._vectorizer.vocabulary_)
+
+    def query(self, labels, k = 1, threshold = 0.6, chunksize = 1000):
+
+        """Return the top k reference labels for each label, with a cosine similarity of at least threshold.
+
+        The similarities are computed by chunks of queries so that the dense part of the work stays bounded.
+
+        param (list-like): labels labels to look up
+        param (int): k maximum number of matches per label
+        param (float): threshold minimum cosine similarity of a match
+        param (int): chunksize number of labels scored per sparse matrix product
+
+        Returns a DataFrame with the columns query (position in labels), position (row in questions) and score."""
+
+        labels = list(labels)
+        queries, positions, scores = [], [], []
+        for start in range(0, len(labels), chunksize):
+            q = self._vectorizer.transform(LabelIndex.normalize(labels[start:start + chunksize]))
+            # TF-IDF rows are L2-normalized, so the dot product is the cosine similarity
+            sim = (q @ self._matrix.T).tocsr()
+            for i in range(sim.shape[0]):
+                row = slice(sim.indptr[i], sim.indptr[i + 1])
+                data, cols = sim.data[row], sim.indices[row]
+                keep = data >= threshold
+                data, cols = data[keep], cols[keep]
+                if len(data) > k:
+                    top = np.argpartition(-data, k - 1)[:k]
+                    data, cols = data[top], cols[top]
+                queries += [start + i] * len(data)
+                positions += cols.tolist()
+                scores += data.tolist()
+
+        return pd.DataFrame({"query": np.array(queries, dtype = int),
+                             "position": np.array(positions, dtype = int),
+                             "score": np.array(scores, dtype = float)})
+
+    def match(self, f, k = 1, threshold = 0.6):
+
+        """Match the main labels of a current Form object against the index.
+
+        Returns a DataFrame with row1, name1, label1, type1 for the current form, row2, name2, label2,
+        type2 for the reference form and matching_score, sorted by decreasing score, or None."""
+
+        current = f.questions[f.questions[f.main_label].notnull()] \
+            .rename(columns = {f.main_label: "label"}) \
+            .reset_index(drop = True)
+        hits = self.query(current["label"], k = k, threshold = threshold)
+
+        if (hits.shape[0] == 0):
+            return None
+
+        left = current.loc[hits["query"], ["index", "name", "label", "type"]].reset_index(drop = True)
+        right = self._questions.loc[hits["position"], ["index", "name", "label", "type"]].reset_index(drop = True)
+        out = pd.concat([left.add_suffix("_x"), right.add_suffix("_y")], axis = 1) \
+            .rename(columns = {"index_x": "row1",
+                               "index_y": "row2",
+                               "name_x": "name1",
+                               "name_y": "name2",
+                               "type_x": "type1",
+                               "type_y": "type2",
+                               "label_x": "label1",
+                               "label_y": "label2"})
+        out["matching_score"] = hits["score"].round(3)
+
+        return out.sort_values(by = ["matching_score", "row1"], ascending = [False, True]) \
+                  .reset_index(drop = True)
+
+    def save(self, path):
+
+        """Save the index to a file."""
+
+        with open(path, "wb") as fh:
+            pickle.dump({"version": form.__version__, "index": self}, fh, protocol = pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path):
+
+        """Load an index saved with save."""
+
+        with open(path, "rb") as fh:
+            content = pickle.load(fh)
+        if content.get("version") != form.__version__:
+            print(f"\t - ⚠️ label index {path} was built with version {content.get('version')}, current version is {form.__version__}")
+        return content["index"]
@@ -0,0 +1,300 @@
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+# ODK XPath tokens: ${name} references, numbers, string literals, operators and names (including
+# function names such as count-selected and prefixed names such as jr:choice-name)
+_token_re = re.compile(r"""
+    \s*(?:
+      (?P<ref>\$\{[^}]*\})
+    | (?P<num>\d+(?:\.\d*)?|\.\d+)
+    | (?P<str>"[^"]*"|'[^']*')
+    | (?P<op>!=|<=|>=|//|\.\.|[=<>+\-*/|,()\[\]@.])
+    | (?P<name>[A-Za-z_][\w.\-]*(?::[A-Za-z_*][\w.\-]*)?)
+    )""", re.VERBOSE)
+
+_operator_names = {"and", "or", "div", "mod"}
+
+# Number of distinct expressions whose canonical form is kept by canonical()
+cache_size = 8192
+# Number of distinct sub-expressions kept in the table of hash-consed nodes
+node_cache_size = 65536
+
+# Hash-consed nodes, shared by all parses of the process: every distinct sub-expression exists once.
+# Nodes are keyed on their content, so that evicting the least recently used ones is always safe.
+_nodes = OrderedDict()
+_nodes_lock = threading.Lock()
+
+def _node(*items):
+
+    """Return the shared node with these items, creating it on first use."""
+
+    with _nodes_lock:
+        node = _nodes.get(items)
+        if node is None:
+            node = _nodes[items] = items
+            if len(_nodes) > node_cache_size:
+                _nodes.popitem(last = False)
+        else:
+            _nodes.move_to_end(items)
+        return node
+
+def tokenize(expression):
+
+    """Split an expression into (kind, value) tokens, raise ValueError on unknown characters."""
+
+    tokens = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        m = _token_re.match(expression, pos)
+        if m is None or m.end() == pos:
+            raise ValueError(f"Unexpected character at position {pos} in {expression!r}")
+        pos = m.end()
+        tokens.append((m.lastgroup, m.group(m.lastgroup)))
+    return tokens
+
+class _Parser:
+
+    """Recursive descent parser for XPath 1.0 expressions as used in ODK XLSForms."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset = 0):
+        pos = self.pos + offset
+        return self.tokens[pos] if pos < len(self.tokens) else (None, None)
+
+    def accept(self, *values):
+        kind, value = self.peek()
+        if kind == "op" and value in values:
+            self.pos += 1
+            return value
+        return None
+
+    def expect(self, value):
+        if self.accept(value) is None:
+            raise ValueError(f"Expected {value!r} at token {self.pos}")
+
+    def parse(self):
+        node = self.or_expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected token {self.peek()[1]!r}")
+        return node
+
+    def chain(self, tag, operand):
+        # and / or chains are flattened so that grouping parentheses do not matter
+        items = [operand()]
+        while self.accept(tag):
+            items.append(operand())
+        if len(items) == 1:
+            return items[0]
+        flat = []
+        for item in items:
+            flat.extend(item[1:] if item[0] == tag else [item])
+        return _node(tag, *flat)
+
+    def or_expr(self):
+        return self.chain("or", self.and_expr)
+
+    def and_expr(self):
+        return self.chain("and", self.equality_expr)
+
+    def binary(self, operators, operand):
+        node = operand()
+        while True:
+            op = self.accept(*operators)
+            if op is None:
+                return node
+            node = _node("op", op, node, operand())
+
+    def equality_expr(self):
+        return self.binary(("=", "!="), self.relational_expr)
+
+    def relational_expr(self):
+        return self.binary(("<=", ">=", "<", ">"), self.additive_expr)
+
+    def additive_expr(self):
+        return self.binary(("+", "-"), self.multiplicative_expr)
+
+    def multiplicative_expr(self):
+        return self.binary(("*", "div", "mod"), self.unary_expr)
+
+    def unary_expr(self):
+        if self.accept("-"):
+            return _node("neg", self.unary_expr())
+        return self.union_expr()
+
+    def union_expr(self):
+        node = self.path_expr()
+        while self.accept("|"):
+            node = _node("union", node, self.path_expr())
+        return node
+
+    def starts_step(self):
+        kind, value = self.peek()
+        return kind == "name" or value in (".", "..", "@", "*")
+
+    def path_expr(self):
+        sep = self.accept("/", "//")
+        if sep is not None:
+            if not self.starts_step():
+                return _node("root", sep)
+            node = _node("root", sep, self.step())
+        else:
+            node = self.filter_expr()
+        while True:
+            sep = self.accept("/", "//")
+            if sep is None:
+                return node
+            node = _node("path", node, sep, self.step())
+
+    def predicates(self, node):
+        while self.accept("["):
+            node = _node("pred", node, self.or_expr())
+            self.expect("]")
+        return node
+
+    def filter_expr(self):
+        kind, value = self.peek()
+        if kind == "ref":
+            self.pos += 1
+            node = _node("ref", value[2:-1].strip())
+        elif kind == "num":
+            self.pos += 1
+            node = _node("num", float(value))
+        elif kind == "str":
+            self.pos += 1
+            node = _node("str", value[1:-1])
+        elif value == "(":
+            self.pos += 1
+            node = self.or_expr()
+            self.expect(")")
+        elif kind == "name" and self.peek(1)[1] == "(":
+            self.pos += 2
+            args = []
+            if not self.accept(")"):
+                args.append(self.or_expr())
+                while self.accept(","):
+                    args.append(self.or_expr())
+                self.expect(")")
+            node = _node("call", value, *args)
+        else:
+            return self.step()
+        return self.predicates(node)
+
+    def step(self):
+        kind, value = self.peek()
+        if value == ".":
+            self.pos += 1
+            node = _node("self")
+        elif value == "..":
+            self.pos += 1
+            node = _node("parent")
+        elif value == "@":
+            self.pos += 1
+            kind, value = self.peek()
+            if kind != "name" and value != "*":
+                raise ValueError(f"Expected attribute name at token {self.pos}")
+            self.pos += 1
+            node = _node("attribute", value)
+        elif kind == "name" or value == "*":
+            self.pos += 1
+            node = _node("step", value)
+        else:
+            raise ValueError(f"Unexpected token {value!r}")
+        return self.predicates(node)
+
+def parse(expression):
+
+    """Parse an ODK XPath expression into a canonical, hash-consed AST of nested tuples.
+
+    Whitespace, quote style, redundant parentheses, number formatting (1 and 1.0) and the grouping of
+    and / or chains do not change the result. Equal sub-expressions are the same object, within an
+    expression and across the expressions parsed by the process (see node_cache_size)."""
+
+    parser = _Parser(tokenize(expression))
+    # Operator names (and, or, div, mod) are only operators after an operand, as in XPath 1.0
+    tokens = parser.tokens
+    for i, (kind, value) in enumerate(tokens):
+        if kind == "name" and value in _operator_names:
+            previous = tokens[i - 1] if i > 0 else (None, None)
+            is_operator = previous[0] in ("ref", "num", "str", "name") or previous[1] in (")", "]", ".", "..", "*")
+            tokens[i] = ("op" if is_operator else "name", value)
+    return parser.parse()
+
+def canonical(expression):
+
+    """Return the canonical form of an expression, parsing every distinct expression only once.
+
+    Expressions that cannot be parsed are compared on their whitespace-normalized text. Values that
+    are not strings (e.g. empty values) are returned as they are. The cache is shared by all forms of
+    the process, so that in a batch of comparisons the parsing cost is paid once per distinct expression
+    and process, and holds the cache_size most recently used expressions, so that it stays bounded in
+    long-running processes. Worker processes (FormComparator.compare_many, batch_compare.py) each have
+    their own caches: nothing is shared between processes."""
+
+    if not isinstance(expression, str):
+        return expression
+    return _canonical(expression)
+
+@lru_cache(maxsize = cache_size)
+def _canonical(expression):
+    try:
+        return parse(expression)
+    except (ValueError, RecursionError):
+        return _node("raw", " ".join(expression.split()))
+
+def render(node):
+
+    """Return the canonical text of a parsed expression."""
+
+    tag = node[0]
+    if tag == "ref":
+        return "${" + node[1] + "}"
+    if tag == "num":
+        return repr(int(node[1])) if node[1].is_integer() else repr(node[1])
+    if tag == "str":
+        return "'" + node[1] + "'" if "'" not in node[1] else '"' + node[1] + '"'
+    if tag in ("and", "or"):
+        return "(" + f" {tag} ".join(render(item) for item in node[1:]) + ")"
+    if tag == "op":
+        return "(" + render(node[2]) + " " + node[1] + " " + render(node[3]) + ")"
+    if tag == "neg":
+        return "-" + render(node[1])
+    if tag == "union":
+        return render(node[1]) + " | " + render(node[2])
+    if tag == "call":
+        return node[1] + "(" + ", ".join(render(arg) for arg in node[2:]) + ")"
+    if tag == "pred":
+        return render(node[1]) + "[" + render(node[2]) + "]"
+    if tag == "root":
+        return node[1] + (render(node[2]) if len(node) > 2 else "")
+    if tag == "path":
+        return render(node[1]) + node[2] + render(node[3])
+    if tag == "self":
+        return "."
+    if tag == "parent":
+        return ".."
+    if tag == "attribute":
+        return "@" + node[1]
+    if tag in ("step", "raw"):
+        return node[1]
+    raise ValueError(f"Unknown node {tag!r}")
+
+def cache_info():
+
+    """Return the statistics of the canonical form cache (hits, misses, maxsize, currsize) and the number
+    of shared nodes."""
+
+    return {"expressions": _canonical.cache_info(), "nodes": len(_nodes)}
+
+def clear_cache():
+
+    """Empty the canonical form cache and the table of shared nodes."""
+
+    _canonical.cache_clear()
+    with _nodes_lock:
+        _nodes.clear()
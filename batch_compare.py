@@ -0,0 +1,232 @@
+"""Run a batch of form comparisons listed in a manifest.
+
+The manifest is a CSV file with the columns cur, ref and (optionally) output, or a YAML file holding a
+list of mappings with the same keys (optionally under a "jobs" key). Relative paths are relative to the
+manifest. Every job writes its FormComparator output file in its output directory, along with a sidecar
+JSON file of the same name recording the SHA-256 of both input forms; jobs whose sidecar matches the current
+inputs and whose output file still exists are skipped, so that an interrupted run can simply be started again.
+Manifests where several jobs would write the same output file (same output directory, and same form IDs and
+versions) are rejected.
+
+Usage:
+    python batch_compare.py manifest.csv --workers 4 --timeout 600 --summary summary.json
+"""
+
+import Form as form
+import FormComparator as comp
+import argparse
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import time
+import traceback
+from collections import deque
+from types import SimpleNamespace
+
+import pandas as pd
+
+def read_manifest(manifest):
+
+    """Return the jobs of a CSV or YAML manifest as a list of dicts with cur, ref and output keys."""
+
+    if manifest.endswith((".yaml", ".yml")):
+        # PyYAML is only needed for YAML manifests
+        import yaml
+        with open(manifest, encoding = "utf-8") as fh:
+            content = yaml.safe_load(fh) or []
+        rows = content.get("jobs", []) if isinstance(content, dict) else content
+    else:
+        rows = pd.read_csv(manifest, dtype = str, keep_default_na = False).to_dict(orient = "records")
+
+    root = os.path.dirname(os.path.abspath(manifest))
+    jobs = []
+    for i, row in enumerate(rows):
+        missing = [key for key in ["cur", "ref"] if not row.get(key)]
+        if missing:
+            raise ValueError(f"Job {i + 1} of {manifest} has no {', '.join(missing)}")
+        jobs.append({key: os.path.join(root, str(row.get(key) or "."))
+                     for key in ["cur", "ref", "output"]})
+    return jobs
+
+def job_output_path(job, engine = None):
+
+    """Path of the output file of a job, named by FormComparator.outputName from the settings sheets only."""
+
+    ids = []
+    for key in ["cur", "ref"]:
+        settings_df = form.read_sheets(job[key], ["settings"], engine = engine)["settings"]
+        get = (lambda name: None) if settings_df is None else (lambda name: settings_df.get(name, [None])[0])
+        ids.append(SimpleNamespace(id = get("form_id"), version = get("version")))
+    return os.path.join(job["output"], comp.FormComparator.outputName(*ids))
+
+def plan_jobs(jobs, engine = None):
+
+    """Set the output_path of every job, and raise ValueError if several jobs would write the same output file.
+
+    Jobs whose inputs cannot be read get no output path, they fail when they are run."""
+
+    targets = {}
+    for job in jobs:
+        try:
+            job["output_path"] = job_output_path(job, engine)
+        except Exception:
+            job["output_path"] = None
+            continue
+        targets.setdefault(os.path.abspath(job["output_path"]), []).append(job)
+
+    duplicates = {path: same for path, same in targets.items() if len(same) > 1}
+    if duplicates:
+        raise ValueError("Several jobs write the same output file:\n" + "\n".join(
+            "\t{}: {}".format(path, ", ".join(f"{job['cur']} vs {job['ref']}" for job in same))
+            for path, same in duplicates.items()))
+    return jobs
+
+def sidecar_path(output_path):
+
+    """Path of the JSON file recording the inputs of the last successful run writing output_path."""
+
+    return os.path.splitext(output_path)[0] + ".json"
+
+def job_inputs(job, options):
+
+    """Return what the output of a job depends on: the content of both forms, the version and the options."""
+
+    return {"cur_sha256": form.file_sha256(job["cur"]),
+            "ref_sha256": form.file_sha256(job["ref"]),
+            "version": form.__version__,
+            "options": options}
+
+def is_up_to_date(job, inputs):
+
+    """Return the output path of a job if it was already run on the same inputs, None otherwise."""
+
+    if not job.get("output_path"):
+        return None
+    try:
+        with open(sidecar_path(job["output_path"]), encoding = "utf-8") as fh:
+            sidecar = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if any(sidecar.get(key) != value for key, value in inputs.items()):
+        return None
+    path = sidecar.get("output_path")
+    return path if path and os.path.exists(path) else None
+
+def run_job(conn, job, options):
+
+    """Worker process: run one comparison and send back its output path or error."""
+
+    try:
+        output_xlsx = os.path.basename(job["output_path"]) if job.get("output_path") else None
+        path = comp.FormComparator(job["cur"], job["ref"], output_dir = job["output"], output_xlsx = output_xlsx,
+                                   **options).output_path
+        conn.send(("ok", os.path.abspath(path)))
+    except Exception:
+        conn.send(("failed", traceback.format_exc()))
+    finally:
+        conn.close()
+
+def run_batch(jobs, options, workers = 1, timeout = None, force = False):
+
+    """Run the jobs on at most workers processes at once, killing jobs that run longer than timeout seconds.
+
+    Returns one result dict per job, in the order of the jobs."""
+
+    results = [dict(job, status = None, output_path = None, seconds = None, error = None) for job in jobs]
+    pending = deque()
+    for i, job in enumerate(jobs):
+        try:
+            inputs = job_inputs(job, options)
+        except OSError as e:
+            print(f"\t - ⚠️ {job['cur']} vs {job['ref']}: {e}")
+            results[i].update(status = "failed", error = str(e))
+            continue
+        done_path = None if force else is_up_to_date(job, inputs)
+        if done_path is not None:
+            print(f"⏭️ Skip {job['cur']} vs {job['ref']}, {done_path} is up to date")
+            results[i].update(status = "skipped", output_path = done_path)
+        else:
+            pending.append((i, inputs))
+
+    running = {}
+    while pending or running:
+        while pending and len(running) < workers:
+            i, inputs = pending.popleft()
+            receiver, sender = multiprocessing.Pipe(duplex = False)
+            process = multiprocessing.Process(target = run_job, args = (sender, jobs[i], options), daemon = True)
+            process.start()
+            sender.close()
+            running[receiver] = (i, inputs, process, time.monotonic())
+
+        deadlines = [start + timeout for _, _, _, start in running.values()] if timeout else []
+        wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+        ready = multiprocessing.connection.wait(list(running.keys()), timeout = wait_for)
+
+        for receiver in list(running.keys()):
+            i, inputs, process, start = running[receiver]
+            seconds = round(time.monotonic() - start, 2)
+            if receiver in ready:
+                try:
+                    status, value = receiver.recv()
+                except EOFError:
+                    status, value = "failed", f"worker exited with code {process.exitcode}"
+                process.join()
+            elif timeout and time.monotonic() - start >= timeout:
+                process.terminate()
+                process.join()
+                status, value = "timeout", f"killed after {timeout} seconds"
+            else:
+                continue
+            receiver.close()
+            del running[receiver]
+
+            if status == "ok":
+                results[i].update(status = "ok", output_path = value, seconds = seconds)
+                with open(sidecar_path(value), "w", encoding = "utf-8") as fh:
+                    json.dump(dict(inputs, cur = jobs[i]["cur"], ref = jobs[i]["ref"], output_path = value), fh, indent = 2)
+            else:
+                print(f"\t - ⚠️ {jobs[i]['cur']} vs {jobs[i]['ref']}: {status}")
+                results[i].update(status = status, seconds = seconds, error = value)
+
+    return results
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description = "Compare the XLSForms listed in a manifest (CSV or YAML with cur, ref and output columns).")
+    parser.add_argument("manifest", help = "CSV or YAML manifest of cur/ref/output jobs")
+    parser.add_argument("--workers", type = int, default = os.cpu_count() or 1, help = "number of worker processes")
+    parser.add_argument("--timeout", type = float, default = None, help = "maximum duration of a job in seconds")
+    parser.add_argument("--summary", default = None, help = "path of the JSON run summary (default: <manifest>_summary.json)")
+    parser.add_argument("--engine", default = None, help = "pandas Excel engine, e.g. calamine")
+    parser.add_argument("--cache-dir", default = None, help = "directory of parsed forms shared by the jobs")
+    parser.add_argument("--multi-language", action = "store_true", help = "also compare translations")
+    parser.add_argument("--force", action = "store_true", help = "run every job, even if its output is up to date")
+    args = parser.parse_args(argv)
+
+    jobs = plan_jobs(read_manifest(args.manifest), engine = args.engine)
+    for job in jobs:
+        os.makedirs(job["output"], exist_ok = True)
+    options = {"engine": args.engine, "cache_dir": args.cache_dir, "multi_language": args.multi_language}
+
+    print(f"📝 Run {len(jobs)} comparisons from {args.manifest} with {args.workers} worker(s)")
+    started = time.time()
+    results = run_batch(jobs, options, workers = max(1, args.workers), timeout = args.timeout, force = args.force)
+
+    counts = pd.Series([result["status"] for result in results], dtype = object).value_counts().to_dict()
+    summary = {"manifest": os.path.abspath(args.manifest),
+               "version": form.__version__,
+               "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+               "seconds": round(time.time() - started, 2),
+               "counts": {status: int(count) for status, count in counts.items()},
+               "jobs": results}
+    summary_path = args.summary or os.path.splitext(args.manifest)[0] + "_summary.json"
+    with open(summary_path, "w", encoding = "utf-8") as fh:
+        json.dump(summary, fh, indent = 2)
+    print(f"📝 Summary stored in {summary_path}: " + ", ".join(f"{count} {status}" for status, count in summary["counts"].items()))
+
+    return 0 if all(result["status"] in ("ok", "skipped") for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
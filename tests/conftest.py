@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# The modules live at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def write_xlsform(path, survey, choices = None, settings = None):
+
+    """Write a minimal XLSForm and return its path.
+
+    survey, choices and settings are dicts of columns. The survey always gets the relevant, calculation
+    and constraint_message columns the comparisons expect, empty unless given."""
+
+    survey = {"relevant": None, "calculation": None, "constraint_message": None, **survey}
+    if choices is None:
+        choices = {"list_name": ["yes_no", "yes_no"], "name": ["yes", "no"], "label": ["Yes", "No"]}
+    if settings is None:
+        settings = {"form_id": ["test_form"], "version": ["1"]}
+    with pd.ExcelWriter(path, engine = "xlsxwriter") as writer:
+        pd.DataFrame(survey).to_excel(writer, sheet_name = "survey", index = False)
+        pd.DataFrame(choices).to_excel(writer, sheet_name = "choices", index = False)
+        pd.DataFrame(settings).to_excel(writer, sheet_name = "settings", index = False)
+    return str(path)
+
+@pytest.fixture
+def xlsform(tmp_path):
+
+    """Return a function writing a minimal XLSForm named file_name in a temporary directory."""
+
+    def write(file_name, survey, choices = None, settings = None):
+        return write_xlsform(tmp_path / file_name, survey, choices = choices, settings = settings)
+    return write
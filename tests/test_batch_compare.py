@@ -0,0 +1,49 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import batch_compare
+
+survey = {"type": ["begin group", "integer", "end group"], "name": ["deceased", "age", None],
+          "label": ["Deceased", "Age in years", None]}
+
+def settings(form_id):
+    return {"form_id": [form_id], "version": ["1"]}
+
+def write_manifest(path, jobs):
+    pd.DataFrame(jobs, columns = ["cur", "ref", "output"]).to_csv(path, index = False)
+    return str(path)
+
+def test_jobs_with_same_file_names_in_different_folders(xlsform, tmp_path):
+    for folder in ["x", "y"]:
+        os.makedirs(tmp_path / folder)
+        xlsform(f"{folder}/cur.xlsx", survey, settings = settings(f"child_{folder}"))
+        xlsform(f"{folder}/ref.xlsx", survey, settings = settings("master"))
+    manifest = write_manifest(tmp_path / "manifest.csv", [["x/cur.xlsx", "x/ref.xlsx", "out"],
+                                                          ["y/cur.xlsx", "y/ref.xlsx", "out"],
+                                                          ["z/missing.xlsx", "y/ref.xlsx", "out"]])
+    summary = str(tmp_path / "summary.json")
+
+    assert batch_compare.main([manifest, "--workers", "2", "--summary", summary]) == 1
+    with open(summary, encoding = "utf-8") as fh:
+        jobs = json.load(fh)["jobs"]
+    assert [job["status"] for job in jobs] == ["ok", "ok", "failed"]
+    assert sorted(os.listdir(tmp_path / "out")) == ["child_x#1!master#1.json", "child_x#1!master#1.xlsx",
+                                                    "child_y#1!master#1.json", "child_y#1!master#1.xlsx"]
+
+    # Every job finds its own sidecar when the run is started again
+    batch_compare.main([manifest, "--workers", "2", "--summary", summary])
+    with open(summary, encoding = "utf-8") as fh:
+        jobs = json.load(fh)["jobs"]
+    assert [job["status"] for job in jobs] == ["skipped", "skipped", "failed"]
+
+def test_jobs_writing_the_same_output_are_rejected(xlsform, tmp_path):
+    xlsform("a.xlsx", survey, settings = settings("child"))
+    xlsform("b.xlsx", survey, settings = settings("child"))
+    xlsform("ref.xlsx", survey, settings = settings("master"))
+    manifest = write_manifest(tmp_path / "manifest.csv", [["a.xlsx", "ref.xlsx", "out"], ["b.xlsx", "ref.xlsx", "out"]])
+
+    with pytest.raises(ValueError, match = "same output file"):
+        batch_compare.main([manifest])
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+import Form as form
+import FormComparator as comp
+
+survey = {"type": ["begin group", "integer", "end group"], "name": ["deceased", "age", None],
+          "label": ["Deceased", "Age in years", None]}
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_compare_many_reports_failures_and_keeps_outputs_apart(xlsform, tmp_path, workers):
+    ref_xlsx = xlsform("ref.xlsx", survey)
+    # Both children have the same form ID and version
+    children = [xlsform("a.xlsx", survey), str(tmp_path / "missing.xlsx"), xlsform("b.xlsx", survey)]
+    output_dir = str(tmp_path / "out")
+
+    results = dict(comp.FormComparator.compare_many(ref_xlsx, children, output_dir = output_dir, workers = workers))
+
+    assert isinstance(results[children[1]], FileNotFoundError)
+    outputs = [results[children[0]], results[children[2]]]
+    assert len(set(outputs)) == 2
+    assert sorted(os.path.basename(path) for path in outputs) == ["test_form#1!test_form#1.xlsx",
+                                                                  "test_form#1!test_form#1~2.xlsx"]
+    assert all(os.path.exists(path) for path in outputs)
+
+def test_compare_many_rejects_streaming_from_an_in_memory_reference(xlsform, tmp_path):
+    ref_xlsx = xlsform("ref.xlsx", survey)
+    with open(ref_xlsx, "rb") as fh:
+        ref_form = form.Form.from_bytes(fh.read(), name = "ref.xlsx")
+
+    with pytest.raises(ValueError, match = "read from a file"):
+        list(comp.FormComparator.compare_many(ref_form, [xlsform("a.xlsx", survey)], output_dir = str(tmp_path),
+                                              workers = 2, choices_chunksize = 10))
+
+    # A reference form created from its path is streamed
+    results = dict(comp.FormComparator.compare_many(form.Form(ref_xlsx), [xlsform("a.xlsx", survey)],
+                                                    output_dir = str(tmp_path), workers = 2, choices_chunksize = 10))
+    assert all(os.path.exists(path) for path in results.values())
+
+def test_streamed_forms_are_not_compared_in_memory(xlsform, tmp_path):
+    ref_form = form.Form(xlsform("ref.xlsx", survey), choices_chunksize = 10)
+
+    with pytest.raises(ValueError, match = "were not loaded"):
+        comp.FormComparator(xlsform("a.xlsx", survey), ref_form, output_dir = str(tmp_path))
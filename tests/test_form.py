@@ -0,0 +1,260 @@
+import zipfile
+
+import pandas as pd
+import pytest
+
+import Form as form
+import XPathExpression as xpath
+
+# Repeated types, so that compact forms store the type column as a categorical
+survey = {
+    "type": ["text", "text", "text", "text", "integer", "select_one yes_no"],
+    "label": ["Name of the deceased", "Name of the respondent", "Village", "Interviewer",
+              "Age in years", "Was the deceased sick?"],
+    "relevant": [None, None, None, None, None, "${name} != ''"]}
+cur_names = ["name", "respondent", "village", "interviewer", "age_years", "sick"]
+ref_names = ["name", "respondent", "village", "interviewer", "age", "sick"]
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_renamed_question_without_constraint_column(xlsform, compact):
+    # Neither form has a constraint column
+    cur = form.Form(xlsform("cur.xlsx", dict(survey, name = cur_names)), compact = compact)
+    ref = form.Form(xlsform("ref.xlsx", dict(survey, name = ref_names)), compact = compact)
+
+    out = cur.compareQuestions(ref).set_index("name")
+
+    assert out.loc["age_years", "status"] == "added"
+    assert out.loc["age", "status"] == "removed"
+    assert out.loc["age_years", "likely_renamed_from"] == "age"
+    assert out.loc["name", "status"] == "unchanged"
+
+def test_renamed_question_compact_categorical_type(xlsform):
+    constraint = {"constraint": [None, None, None, None, ". < 130", None]}
+    cur = form.Form(xlsform("cur.xlsx", dict(survey, name = cur_names, **constraint)), compact = True)
+    ref = form.Form(xlsform("ref.xlsx", dict(survey, name = ref_names, **constraint)), compact = True)
+    assert cur.questions["type"].dtype == "category"
+
+    out = cur.compareQuestions(ref).set_index("name")
+
+    assert out.loc["age_years", "likely_renamed_from"] == "age"
+
+def test_identical_choices_with_different_default_languages(xlsform):
+    bilingual_survey = {"type": ["select_one yes_no"], "name": ["sick"],
+                        "label::English": ["Was the deceased sick?"], "label::French": ["Le défunt était-il malade ?"]}
+    choices = {"list_name": ["yes_no", "yes_no", "yes_no"], "name": ["yes", "no", "dk"],
+               "label::English": ["Yes", "No", "DK"], "label::French": ["Oui", "Non", "DK"]}
+    english = form.Form(xlsform("en.xlsx", bilingual_survey, choices = choices,
+                                settings = {"form_id": ["test_form"], "version": ["1"], "default_language": ["English"]}))
+    french = form.Form(xlsform("fr.xlsx", bilingual_survey, choices = choices,
+                               settings = {"form_id": ["test_form"], "version": ["1"], "default_language": ["French"]}))
+    assert english.sameSheet(french, "choices")
+
+    # The English labels are compared with the French ones, so the shortcut for identical sheets does not apply
+    out = english.compareChoices(french).set_index("name")
+    assert out.loc["yes", "current_label"] == "Yes"
+    assert out.loc["yes", "reference_label"] == "Oui"
+    assert out.loc["yes", "status"] == "modified_label"
+    assert out.loc["dk", "status"] == "unchanged"
+
+    # With the same default language, identical sheets are all unchanged
+    out = english.compareChoices(english)
+    assert (out["status"] == "unchanged").all()
+
+def test_match_modified_columns():
+    removed = ["label::Englsh", "label::Frnch", "hint::Englsh", "media::image::English"]
+    added = ["label::English", "label::French", "hint::Spanish", "image::English"]
+
+    modified = form.Form.matchModifiedColumns(removed, added)
+
+    # Every name is paired with its best candidate of the same prefix only
+    assert sorted(modified) == [("label::Englsh", "label::English"), ("label::Frnch", "label::French")]
+
+def test_read_sheets_in_one_pass(xlsform):
+    sheets = form.read_sheets(xlsform("form.xlsx", dict(survey, name = cur_names)), ["survey", "choices", "entities"])
+
+    assert sheets["survey"]["name"].tolist() == cur_names
+    assert sheets["choices"]["list_name"].tolist() == ["yes_no", "yes_no"]
+    assert sheets["entities"] is None
+
+def test_derived_structures_are_built_on_first_access(xlsform):
+    f = form.Form(xlsform("form.xlsx", dict(survey, name = cur_names)))
+    assert f._questions is None and f._group_df is None and f._common_words is None
+    assert f.id == "test_form"
+    assert f._questions is None
+
+    assert f.questions["name"].tolist() == cur_names
+    assert f._group_df is not None
+    assert "name" in f.common_words
+
+def test_questions_get_their_enclosing_group(xlsform):
+    nested = {"type": ["begin group", "text", "end group", "begin group", "integer", "begin repeat", "text",
+                       "end repeat", "text", "end group", "text"],
+              "name": ["id", "name", None, "history", "age", "visits", "place", None, "notes", None, "comment"],
+              "label": ["Identification", "Name", None, "History", "Age", "Visits", "Place", None, "Notes", None,
+                        "Comment"]}
+    f = form.Form(xlsform("form.xlsx", nested))
+
+    assert dict(zip(f.questions["name"], f.questions["group_id"])) == \
+        {"name": "id", "age": "history", "place": "visits", "notes": "history", "comment": None}
+    groups = f.groups.set_index("name")
+    assert groups["parent"].to_dict() == {"id": None, "history": None, "visits": "history"}
+    assert groups["type"].to_dict() == {"id": "group", "history": "group", "visits": "repeat"}
+    expected, _ = form.Form.extract_groups(f.group_od)
+    assert f.groups.to_dict(orient = "records") == expected
+
+def test_unmatched_end_group_raises(xlsform):
+    f = form.Form(xlsform("form.xlsx", {"type": ["text", "end group"], "name": ["name", None], "label": ["Name", None]}))
+
+    with pytest.raises(ValueError, match = "Unmatched end"):
+        f.questions
+
+def test_common_words_by_language(xlsform):
+    bilingual = {"type": ["text", "text", "integer"], "name": ["name", "respondent", "age"],
+                 "label::English": ["Name of the deceased", "Name of the respondent", "Age of the deceased"],
+                 "label::French": ["Nom du défunt", "Nom du répondant", "Âge du défunt"]}
+    f = form.Form(xlsform("form.xlsx", bilingual))
+
+    words = f.common_words_by_language
+    assert set(words) == {"label::English", "label::French"}
+    assert words["label::English"][:4] == ["of", "the", "name", "deceased"]
+    assert words["label::French"][:3] == ["du", "nom", "défunt"]
+
+def test_compare_translations_in_every_language(xlsform):
+    cur = form.Form(xlsform("cur.xlsx", {"type": ["text", "integer"], "name": ["name", "age"],
+                                         "label::English": ["Name", "Age in years"],
+                                         "label::French": ["Nom", "Âge en années"],
+                                         "hint::French": [None, "En années révolues"]}))
+    ref = form.Form(xlsform("ref.xlsx", {"type": ["text", "integer"], "name": ["name", "age"],
+                                         "label::English": ["NAME", "Age"],
+                                         "label::French": ["Nom", "Âge en années"],
+                                         "label::Spanish": ["Nombre", None]}))
+
+    out = cur.compareTranslations(ref).set_index(["name", "field", "language"])
+
+    assert out.loc[("name", "label", "English"), "status"] == "unchanged"
+    assert out.loc[("age", "label", "English"), "status"] == "modified"
+    assert 0 < out.loc[("age", "label", "English"), "edit_distance"] < 1
+    assert out.loc[("age", "label", "French"), "mod"] == 0
+    assert out.loc[("age", "hint", "French"), "status"] == "added"
+    assert out.loc[("name", "label", "Spanish"), "status"] == "removed"
+    assert ("age", "label", "Spanish") not in out.index
+
+def test_compact_forms_compare_like_regular_forms(xlsform):
+    cur_xlsx = xlsform("cur.xlsx", dict(survey, name = cur_names))
+    ref_xlsx = xlsform("ref.xlsx", dict(survey, name = ref_names))
+    regular = form.Form(cur_xlsx).compareQuestions(form.Form(ref_xlsx))
+    compact_cur = form.Form(cur_xlsx, compact = True)
+
+    compact = compact_cur.compareQuestions(form.Form(ref_xlsx, compact = True))
+
+    assert compact_cur.survey["type"].dtype == "category"
+    assert isinstance(compact_cur.survey["label"].dtype, pd.StringDtype)
+    assert compact[["name", "status"]].astype(str).equals(regular[["name", "status"]].astype(str))
+    usage = compact_cur.memory_usage()
+    assert {"survey", "choices", "settings", "questions"} <= set(usage.index)
+    assert (usage > 0).all()
+
+def test_forms_from_bytes_buffers_and_zip_bundles(xlsform, tmp_path):
+    cur_xlsx = xlsform("cur.xlsx", dict(survey, name = cur_names))
+    with open(cur_xlsx, "rb") as fh:
+        data = fh.read()
+    bundle = tmp_path / "release.zip"
+    with zipfile.ZipFile(bundle, "w") as zf:
+        zf.writestr("forms/cur.xlsx", data)
+        zf.writestr("forms/~$cur.xlsx", b"lock")
+        zf.writestr("__MACOSX/forms/._cur.xlsx", b"metadata")
+
+    from_bytes = form.Form.from_bytes(data, name = "upload.xlsx")
+    with open(cur_xlsx, "rb") as fh:
+        from_buffer = form.Form.from_buffer(fh)
+
+    assert from_bytes.file_name == "upload.xlsx" and from_bytes.source is None
+    assert from_buffer.file_name == "cur.xlsx"
+    assert form.Form.zip_members(bundle) == ["forms/cur.xlsx"]
+    [(member, from_zip)] = list(form.Form.iter_zip(bundle))
+    assert member == "forms/cur.xlsx" and from_zip.file_name == "cur.xlsx"
+    for f in [from_bytes, from_buffer, from_zip]:
+        assert f.questions.equals(form.Form(cur_xlsx).questions)
+
+def test_compare_questions_aligns_both_forms_once(xlsform):
+    cur = form.Form(xlsform("cur.xlsx", {"type": ["begin group", "text", "integer", "text", "end group"],
+                                         "name": ["id", "name", "age", "village", None],
+                                         "label": ["Identification", "Name", "Age in full years", "Village", None]}))
+    ref = form.Form(xlsform("ref.xlsx", {"type": ["begin group", "text", "integer", "date", "end group"],
+                                         "name": ["id", "name", "age", "dob", None],
+                                         "label": ["Identification", "Name", "Age in years", "Date of birth", None]}))
+
+    out = cur.compareQuestions(ref)
+
+    assert dict(zip(out["name"], out["status"])) == \
+        {"name": "unchanged", "age": "modified", "village": "added", "dob": "removed"}
+    assert out["order"].is_monotonic_increasing
+    age = out.set_index("name").loc["age"]
+    assert (age["current_label"], age["reference_label"]) == ("Age in full years", "Age in years")
+    assert 0 < age["label_mod"] < 1
+
+def test_compare_choices_statuses(xlsform):
+    group_survey = {"type": ["begin group", "select_one yes_no", "end group"], "name": ["id", "sick", None],
+                    "label": ["Identification", "Was the deceased sick?", None]}
+    cur = form.Form(xlsform("cur.xlsx", group_survey, choices = {
+        "list_name": ["yes_no", "yes_no", "yes_no", "sex", "sex"], "name": ["yes", "no", "dk", "male", "female"],
+        "label": ["Yes", "No!", "Don't know", "Male", "Female"]}))
+    ref = form.Form(xlsform("ref.xlsx", group_survey, choices = {
+        "list_name": ["yes_no", "yes_no", "yes_no", "place", "place"], "name": ["yes", "no", "ref", "home", "hospital"],
+        "label": ["Yes", "No", "Refused", "Home", "Hospital"]}))
+
+    out = cur.compareChoices(ref).set_index(["list_name", "name"])["status"].to_dict()
+
+    assert out == {("place", "home"): "list_name_removed", ("place", "hospital"): "list_name_removed",
+                   ("sex", "female"): "list_name_added", ("sex", "male"): "list_name_added",
+                   ("yes_no", "dk"): "added", ("yes_no", "no"): "modified_label",
+                   ("yes_no", "ref"): "removed", ("yes_no", "yes"): "unchanged"}
+
+def test_check_modifications_is_null_aware():
+    x = pd.Series(["${a} = 'yes'", None, "${b}", None, "1"], dtype = object)
+    y = pd.Series(['(${a}="yes")', None, None, "${c}", "2"], dtype = object)
+
+    assert form.Form.checkModifications(x, y).tolist() == [1, 0, 1, 1, 1]
+    assert form.Form.checkModifications(x, y, normalize = xpath.canonical).tolist() == [0, 0, 1, 1, 1]
+    # Arrow-backed strings (compact forms) give the same flags
+    assert form.Form.checkModifications(x.astype("string[pyarrow]"), y.astype("string[pyarrow]")).tolist() == [1, 0, 1, 1, 1]
+
+def test_batched_edit_distances_match_pairwise_distances():
+    s1 = ["Age in years", "Name", None, "", "Village", "abc"]
+    s2 = ["Age", "Name", "Place", "", None, "xyz"]
+
+    distances = form.Form.get_normalized_edit_distances(s1, s2)
+
+    assert distances.tolist() == [form.Form.get_normalized_edit_distance(a, b) for a, b in zip(s1, s2)]
+    assert distances[1] == 0.0 and distances[5] == 1.0
+    assert form.Form.get_normalized_edit_distances(s1, s2, score_cutoff = 0.5)[0] == 1.0
+    assert len(form.Form.get_normalized_edit_distances([], [])) == 0
+
+def test_sheet_digests_follow_sheet_content(xlsform):
+    f = form.Form(xlsform("a.xlsx", dict(survey, name = cur_names)))
+    same = form.Form(xlsform("b.xlsx", dict(survey, name = cur_names)))
+    edited = form.Form(xlsform("c.xlsx", dict(survey, name = ref_names)))
+
+    assert f.sheet_digests == same.sheet_digests
+    assert f.sameSheet(same, "survey") and f.sameSheet(edited, "choices")
+    assert not f.sameSheet(edited, "survey")
+    assert f.sheet_digests["entities"] is None
+
+def test_sheet_digests_tell_numbers_from_texts(xlsform):
+    group_survey = {"type": ["begin group", "select_one yes_no", "end group"], "name": ["id", "sick", None],
+                    "label": ["Identification", "Was the deceased sick?", None]}
+    numbers = form.Form(xlsform("numbers.xlsx", group_survey,
+                                choices = {"list_name": ["yes_no", "yes_no"], "name": ["yes", 1], "label": ["Yes", "No"]}))
+    texts = form.Form(xlsform("texts.xlsx", group_survey,
+                              choices = {"list_name": ["yes_no", "yes_no"], "name": ["yes", "1"], "label": ["Yes", "No"]}))
+
+    assert not numbers.sameSheet(texts, "choices")
+    out = numbers.compareChoices(texts)
+    assert sorted(zip(out["name"].astype(str) + ":" + out["name"].map(lambda v: type(v).__name__), out["status"])) == \
+        [("1:int", "added"), ("1:str", "removed"), ("yes:str", "unchanged")]
+
+def test_compact_keeps_setting_values(xlsform):
+    f = form.Form(xlsform("form.xlsx", dict(survey, name = cur_names)), compact = True)
+
+    assert f.settings["form_id"].dtype == object
+    assert (f.id, f.version) == ("test_form", 1)
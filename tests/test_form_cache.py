@@ -0,0 +1,63 @@
+import os
+
+import pandas as pd
+
+import Form as form
+
+survey = {"type": ["begin group", "integer", "text", "end group"], "name": ["deceased", "age", "place", None],
+          "label": ["Deceased", "Age in years", "Place of death", None]}
+
+def test_load_from_cache(xlsform, tmp_path, capsys):
+    xlsx = xlsform("form.xlsx", survey)
+    cache_dir = str(tmp_path / "cache")
+
+    parsed = form.Form.load(xlsx, cache_dir = cache_dir)
+    cached = form.Form.load(xlsx, cache_dir = cache_dir)
+
+    assert "from cache" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(cached.questions, parsed.questions)
+    assert cached.group_od == parsed.group_od
+    assert cached.list_names == parsed.list_names
+
+def test_cache_format_is_part_of_the_key(xlsform, tmp_path, monkeypatch, capsys):
+    xlsx = xlsform("form.xlsx", survey)
+    cache_dir = str(tmp_path / "cache")
+    form.Form.load(xlsx, cache_dir = cache_dir)
+
+    # Entries written with another format are not reused
+    monkeypatch.setattr(form, "cache_format", form.cache_format + 1)
+    capsys.readouterr()
+    form.Form.load(xlsx, cache_dir = cache_dir)
+
+    assert "from cache" not in capsys.readouterr().out
+    assert len(os.listdir(cache_dir)) == 2
+
+def test_cache_write_failures_do_not_fail_loading(xlsform, tmp_path, monkeypatch, capsys):
+    import pyarrow
+
+    xlsx = xlsform("form.xlsx", survey)
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("")
+    f = form.Form.load(xlsx, cache_dir = str(not_a_dir / "cache"))
+    assert f.questions["name"].tolist() == ["age", "place"]
+    assert "Could not store form.xlsx in cache" in capsys.readouterr().out
+
+    def write_frame(df, path_stem):
+        raise pyarrow.ArrowInvalid("cannot store this frame")
+    monkeypatch.setattr(form, "write_frame", write_frame)
+    f = form.Form.load(xlsx, cache_dir = str(tmp_path / "cache"))
+    assert f.questions["name"].tolist() == ["age", "place"]
+    assert "cannot store this frame" in capsys.readouterr().out
+    assert os.listdir(tmp_path / "cache") == []
+
+def test_numeric_column_labels_round_trip(xlsform, tmp_path, capsys):
+    xlsx = xlsform("form.xlsx", {**survey, 2024: [None, "a", None, None]})
+    cache_dir = str(tmp_path / "cache")
+
+    parsed = form.Form.load(xlsx, cache_dir = cache_dir)
+    capsys.readouterr()
+    cached = form.Form.load(xlsx, cache_dir = cache_dir)
+
+    assert "from cache" in capsys.readouterr().out
+    assert 2024 in parsed.survey.columns
+    pd.testing.assert_frame_equal(cached.survey, parsed.survey)
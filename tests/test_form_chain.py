@@ -0,0 +1,27 @@
+import FormChain as chain
+
+def version(xlsform, file_name, number, questions):
+    # The questions are in a group, as group comparisons need at least one group
+    names = list(questions)
+    return xlsform(file_name,
+                   {"type": ["begin group"] + ["integer"] * len(names) + ["end group"],
+                    "name": ["deceased"] + names + [None],
+                    "label": ["Deceased"] + [questions[n] for n in names] + [None]},
+                   settings = {"form_id": ["test_form"], "version": [number]})
+
+def test_lineage_statuses(xlsform, tmp_path):
+    forms = [
+        version(xlsform, "v1.xlsx", "1", {"age": "Age in years", "weight": "Weight", "hours": "Age in hours"}),
+        version(xlsform, "v2.xlsx", "2", {"age": "Age in years", "weight": "Weight in kg", "days": "Age in days"}),
+        version(xlsform, "v3.xlsx", "3", {"age": "Age in years", "weight": "Weight in kg", "hours": "Age in hours"})]
+
+    lineage = chain.FormChain(forms, output_dir = str(tmp_path)).lineage.set_index("name")
+
+    assert lineage.loc["age", "status"] == "unchanged"
+    assert lineage.loc["weight", "status"] == "modified"
+    assert lineage.loc["weight", "last_modified_in"] == "2"
+    # Removed in the second version and added again in the third one
+    assert lineage.loc["hours", "status"] == "readded"
+    assert lineage.loc["hours", "removed_in"] == "2"
+    assert lineage.loc["hours", "introduced_in"] == "3"
+    assert lineage.loc["days", "status"] == "transient"
@@ -0,0 +1,43 @@
+import Form as form
+import FormComparator as comp
+
+survey = {"type": ["begin group", "text", "integer", "select_one yes_no", "end group"],
+          "name": ["id", "name", "age", "sick", None],
+          "label": ["Identification", "Name", "Age in years", "Was the deceased sick?", None]}
+choices = {"list_name": ["yes_no", "yes_no", "sex", "sex"], "name": ["yes", "no", "male", "female"],
+           "label": ["Yes", "No", "Male", "Female"]}
+
+def test_incremental_comparison_matches_full_comparison(xlsform, tmp_path):
+    ref_xlsx = xlsform("ref.xlsx", survey, choices = choices)
+    first = comp.FormComparator(xlsform("cur_v1.xlsx", survey, choices = choices), ref_xlsx, output_dir = str(tmp_path))
+    # Edit one question and one choice list
+    cur_xlsx = xlsform("cur_v2.xlsx", dict(survey, label = ["Identification", "Name", "Age in full years",
+                                                            "Was the deceased sick?", None]),
+                       choices = dict(choices, label = ["Yes", "No", "Man", "Woman"]))
+
+    full = comp.FormComparator(cur_xlsx, ref_xlsx, output_dir = str(tmp_path))
+    incremental = comp.FormComparator(cur_xlsx, ref_xlsx, output_dir = str(tmp_path), previous = first)
+
+    assert incremental.survey_questions.reset_index(drop = True).equals(full.survey_questions.reset_index(drop = True))
+    assert incremental.choices.reset_index(drop = True).equals(full.choices.reset_index(drop = True))
+    statuses = dict(zip(full.survey_questions["name"], full.survey_questions["status"]))
+    assert statuses == {"name": "unchanged", "age": "modified", "sick": "unchanged"}
+
+def test_incremental_comparison_compares_lists_changed_from_numbers_to_texts(xlsform, tmp_path):
+    numbers = dict(choices, name = ["yes", "no", 1, 2])
+    ref_xlsx = xlsform("ref.xlsx", survey, choices = numbers)
+    first = comp.FormComparator(xlsform("cur_v1.xlsx", survey, choices = numbers), ref_xlsx, output_dir = str(tmp_path))
+    cur_xlsx = xlsform("cur_v2.xlsx", survey, choices = dict(choices, name = ["yes", "no", "1", "two"]))
+
+    full = comp.FormComparator(cur_xlsx, ref_xlsx, output_dir = str(tmp_path))
+    incremental = comp.FormComparator(cur_xlsx, ref_xlsx, output_dir = str(tmp_path), previous = first)
+
+    assert incremental.choices.reset_index(drop = True).equals(full.choices.reset_index(drop = True))
+    assert (full.choices["list_name"] == "sex").sum() == 4
+
+def test_list_fingerprints_of_compact_forms(xlsform, recwarn):
+    f = form.Form(xlsform("form.xlsx", survey, choices = choices), compact = True)
+    assert f.choices["list_name"].dtype == "category"
+
+    assert f.list_fingerprints.index.tolist() == ["yes_no", "sex"]
+    assert not [w for w in recwarn if issubclass(w.category, FutureWarning)]
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import Form as form
+import FormComparator as comp
+from FormServer import FormCache, FormServer, HTTPError
+
+survey = {"type": ["begin group", "integer", "text", "end group"], "name": ["deceased", "age", "place", None],
+          "label": ["Deceased", "Age in years", "Place of death", None]}
+
+class Sized:
+
+    def __init__(self, size):
+        self.size = size
+
+    def memory_usage(self):
+        return pd.Series({"survey": self.size})
+
+def test_form_cache_evicts_least_recently_used_forms():
+    cache = FormCache(max_bytes = 250)
+    cache.put("a", Sized(100))
+    cache.put("b", Sized(100))
+    assert cache.get("a") is not None
+    cache.put("c", Sized(100))
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.total_bytes == 200
+    # The most recently used form is kept even if it is over the cap on its own
+    cache.put("d", Sized(1000))
+    assert len(cache) == 1 and "d" in cache
+
+def test_memory_usage_counts_derived_structures(xlsform):
+    f = form.Form(xlsform("form.xlsx", survey))
+    before = f.memory_usage()
+    f.common_words
+    f.sheet_digests
+    f.label_index
+    after = f.memory_usage()
+    assert {"common_words", "sheet_digests", "label_index"} <= set(after.index) - set(before.index)
+    assert (after[["common_words", "sheet_digests", "label_index"]] > 0).all()
+
+def test_compare_returns_overview(xlsform, tmp_path):
+    server = FormServer(output_dir = str(tmp_path / "out"))
+    os.makedirs(tmp_path / "out")
+    ref_xlsx = xlsform("ref.xlsx", survey, settings = {"form_id": ["test_form"], "version": ["0"]})
+    body = json.dumps({"cur": xlsform("cur.xlsx", survey), "ref": ref_xlsx}).encode()
+
+    result = asyncio.run(server.route("POST", "/compare", body))
+
+    assert os.path.basename(result["output_path"]) == "test_form#1!test_form#0.xlsx"
+    assert os.path.exists(result["output_path"])
+    assert len(server.cache) == 2
+
+def test_concurrent_compares_write_the_same_output_one_at_a_time(xlsform, tmp_path, monkeypatch):
+    active, overlaps = [0], []
+    lock = threading.Lock()
+
+    class SlowComparator:
+
+        outputName = staticmethod(comp.FormComparator.outputName)
+
+        def __init__(self, cur_form, ref_form, output_dir = ".", output_xlsx = None, **kwargs):
+            with lock:
+                active[0] += 1
+                overlaps.append(active[0])
+            time.sleep(0.2)
+            with lock:
+                active[0] -= 1
+            self.output_path = os.path.join(output_dir, output_xlsx)
+            self.overview = pd.DataFrame({"Comparison Type": ['=HYPERLINK("#a", "Form ID")']})
+
+    monkeypatch.setattr(comp, "FormComparator", SlowComparator)
+    server = FormServer(output_dir = str(tmp_path))
+    body = json.dumps({"cur": xlsform("cur.xlsx", survey), "ref": xlsform("ref.xlsx", survey)}).encode()
+
+    async def run():
+        return await asyncio.gather(*[server.compare(body) for _ in range(3)])
+    results = asyncio.run(run())
+
+    assert max(overlaps) == 1
+    assert len({result["output_path"] for result in results}) == 1
+    assert server._writing == {}
+
+def test_unreadable_forms_are_bad_requests(tmp_path):
+    server = FormServer(output_dir = str(tmp_path))
+    not_a_form = tmp_path / "notes.xlsx"
+    not_a_form.write_bytes(b"not a workbook")
+
+    with pytest.raises(HTTPError) as error:
+        asyncio.run(server.route("POST", "/forms?name=notes.xlsx", b"not a workbook"))
+    assert error.value.status == 400 and "Cannot read notes.xlsx" in str(error.value)
+
+    body = json.dumps({"cur": str(not_a_form), "ref": str(not_a_form)}).encode()
+    with pytest.raises(HTTPError) as error:
+        asyncio.run(server.route("POST", "/compare", body))
+    assert error.value.status == 400
+    assert len(server.cache) == 0
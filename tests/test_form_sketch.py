@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+import Form as form
+from conftest import write_xlsform
+from FormSketch import FormSketch, FormSketchIndex
+
+def survey(names, labels):
+    return {"type": ["begin group"] + ["text"] * len(names) + ["end group"],
+            "name": ["main"] + names + [None], "label": ["Main"] + labels + [None]}
+
+master_names = [f"q{i}" for i in range(20)]
+master_labels = [f"Question number {i} about the deceased" for i in range(20)]
+
+@pytest.fixture
+def folder(tmp_path):
+    write_xlsform(tmp_path / "master.xlsx", survey(master_names, master_labels))
+    write_xlsform(tmp_path / "child.xlsx", survey(master_names[:-1] + ["local"], master_labels[:-1] + ["Local question"]))
+    write_xlsform(tmp_path / "other.xlsx", survey([f"x{i}" for i in range(20)], [f"Household item {i}" for i in range(20)]),
+                  choices = {"list_name": ["assets"], "name": ["radio"], "label": ["Radio"]})
+    return tmp_path
+
+def test_sketch_similarity_estimates_jaccard_similarity(folder):
+    master, child, other = (form.Form(str(folder / name)) for name in ["master.xlsx", "child.xlsx", "other.xlsx"])
+    sketches = [FormSketch(f, num_perm = 256) for f in [master, child, other]]
+
+    features = [FormSketch.shingles(f) for f in [master, child]]
+    jaccard = len(features[0] & features[1]) / len(features[0] | features[1])
+    assert abs(sketches[0].similarity(sketches[1]) - jaccard) < 0.15
+    assert sketches[0].similarity(sketches[0]) == 1.0
+    assert sketches[0].similarity(sketches[2]) < 0.1
+    with pytest.raises(ValueError):
+        sketches[0].similarity(FormSketch(master, num_perm = 128))
+
+def test_index_clusters_derived_forms(folder):
+    index = FormSketchIndex.from_folder(str(folder), threshold = 0.5)
+
+    clusters = index.clusters().set_index("name")["cluster"]
+    assert clusters["child.xlsx"] == clusters["master.xlsx"] != clusters["other.xlsx"]
+    matrix = index.similarity_matrix()
+    assert np.allclose(matrix.to_numpy(), matrix.to_numpy().T)
+    assert matrix.loc["master.xlsx", "child.xlsx"] > 0.5 and matrix.loc["master.xlsx", "other.xlsx"] < 0.1
+    with pytest.raises(ValueError):
+        FormSketchIndex(index._sketches, bands = 30)
@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def imported_modules(statement, modules):
+    # A fresh interpreter, as the test session may already have imported them
+    code = f"import sys; {statement}; print(' '.join(m for m in {modules!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd = root, capture_output = True, text = True, check = True)
+    return result.stdout.split()
+
+def test_import_form_is_light():
+    heavy = ["sklearn", "skrub", "nltk", "scipy", "scipy.optimize"]
+    assert imported_modules("import Form", heavy) == []
+    assert imported_modules("import FormComparator", heavy) == []
+
+def test_import_form_within_budget():
+    # Time of Form's own imports (pandas and numpy are loaded first), best of three fresh interpreters
+    code = "import time, pandas, numpy; start = time.perf_counter(); import Form; print(time.perf_counter() - start)"
+    seconds = min(float(subprocess.run([sys.executable, "-c", code], cwd = root, capture_output = True, text = True,
+                                       check = True).stdout.split()[-1])
+                  for _ in range(3))
+    assert seconds < 0.3
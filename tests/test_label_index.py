@@ -0,0 +1,31 @@
+import Form as form
+from LabelIndex import LabelIndex
+
+survey = {"type": ["begin group", "text", "integer", "text", "end group"], "name": ["id", "name", "age", "village", None],
+          "label": ["Identification", "Name of the deceased", "Age of the deceased in years", "Village of residence", None]}
+
+def test_similar_labels_with_a_saved_index(xlsform, tmp_path):
+    ref = form.Form(xlsform("ref.xlsx", survey))
+    cur = form.Form(xlsform("cur.xlsx", dict(survey, name = ["id", "dec_name", "dec_age", "town", None],
+                                             label = ["Identification", "Name of deceased",
+                                                      "Age of deceased (years)", "Town of birth", None])))
+    index = LabelIndex.from_form(ref)
+    index.save(tmp_path / "labels.pkl")
+
+    similar = cur.detectSimilarLabels(ref, index = LabelIndex.load(tmp_path / "labels.pkl"), k = 1, threshold = 0.6)
+
+    assert len(index) == 3
+    assert dict(zip(similar["name1"], similar["name2"])) == {"dec_name": "name", "dec_age": "age"}
+    assert similar["matching_score"].is_monotonic_decreasing
+    assert similar.equals(cur.detectSimilarLabels(ref, k = 1, threshold = 0.6))
+
+def test_query_keeps_the_top_k_matches_above_the_threshold(xlsform):
+    index = LabelIndex.from_form(form.Form(xlsform("ref.xlsx", survey)))
+
+    hits = index.query(["Name of the deceased", "Completely unrelated text"], k = 2, threshold = 0.1, chunksize = 1)
+
+    assert set(hits["query"]) <= {0, 1}
+    assert (hits.groupby("query").size() <= 2).all()
+    top = hits[hits["query"] == 0].sort_values("score").iloc[-1]
+    assert index.questions.loc[top["position"], "name"] == "name" and abs(top["score"] - 1) < 1e-9
+    assert index.query(["Name of the deceased"], threshold = 1.1).empty
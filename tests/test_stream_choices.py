@@ -0,0 +1,64 @@
+import warnings
+
+import pandas as pd
+
+import Form as form
+import FormComparator as comp
+
+survey = {"type": ["begin group", "select_one yes_no", "end group"], "name": ["deceased", "sick", None],
+          "label": ["Deceased", "Was the deceased sick?", None]}
+cur_choices = {"list_name": ["yes_no", "yes_no", "yes_no", "sex"], "name": ["yes", "no", "dk", "female"],
+               "label": ["Yes", "No!", "Don't know", "Female"]}
+ref_choices = {"list_name": ["yes_no", "yes_no", "yes_no", "place"], "name": ["yes", "no", "ref", "home"],
+               "label": ["Yes", "No", "Refused", "Home"]}
+columns = ["list_name", "name", "status", "current_label", "reference_label"]
+
+def rows(df):
+    # Sorted on their repr, so that 1 and "1" stay distinct and sortable
+    return sorted(df[columns].astype(object).where(df[columns].notnull(), None).itertuples(index = False, name = None),
+                  key = repr)
+
+def test_stream_compare_choices_matches_compare_choices(xlsform):
+    cur_xlsx = xlsform("cur.xlsx", survey, choices = cur_choices)
+    ref_xlsx = xlsform("ref.xlsx", survey, choices = ref_choices)
+    expected = form.Form(cur_xlsx).compareChoices(form.Form(ref_xlsx))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FutureWarning)
+        streamed = pd.concat(form.Form.streamCompareChoices(cur_xlsx, ref_xlsx, chunksize = 1))
+
+    assert rows(streamed) == rows(expected)
+    assert set(streamed["status"]) == {"unchanged", "modified_label", "added", "removed",
+                                       "list_name_added", "list_name_removed"}
+
+def test_comparator_streams_choices_without_loading_them(xlsform, tmp_path):
+    cur_xlsx = xlsform("cur.xlsx", survey, choices = cur_choices)
+    ref_xlsx = xlsform("ref.xlsx", survey, choices = ref_choices)
+
+    result = comp.FormComparator(cur_xlsx, ref_xlsx, output_dir = str(tmp_path), choices_chunksize = 2)
+
+    assert result.current_form.choices is None and result.reference_form.choices is None
+    assert result.current_form.list_names == ["yes_no", "sex"]
+    assert rows(result.choices) == rows(form.Form(cur_xlsx).compareChoices(form.Form(ref_xlsx)))
+
+def test_comparator_streams_empty_choices_sheets(xlsform, tmp_path):
+    empty = {"list_name": [], "name": [], "label": []}
+    cur_xlsx = xlsform("cur.xlsx", survey, choices = empty)
+    ref_xlsx = xlsform("ref.xlsx", survey, choices = empty)
+
+    result = comp.FormComparator(cur_xlsx, ref_xlsx, output_dir = str(tmp_path), choices_chunksize = 2)
+
+    assert result.choices.empty
+
+def test_stream_compare_choices_tells_numbers_from_texts(xlsform):
+    cur_xlsx = xlsform("cur.xlsx", survey, choices = {"list_name": ["yes_no", "yes_no", "yes_no"],
+                                                      "name": ["yes", 1, 2], "label": ["Yes", "No", "Don't know"]})
+    ref_xlsx = xlsform("ref.xlsx", survey, choices = {"list_name": ["yes_no", "yes_no", "yes_no"],
+                                                      "name": ["yes", "1", 2], "label": ["Yes", "No", "Don't know"]})
+    expected = form.Form(cur_xlsx).compareChoices(form.Form(ref_xlsx))
+
+    streamed = pd.concat(form.Form.streamCompareChoices(cur_xlsx, ref_xlsx, chunksize = 2))
+
+    assert rows(streamed) == rows(expected)
+    assert sorted(map(repr, zip(streamed["name"], streamed["status"]))) == \
+        ["('1', 'removed')", "('yes', 'unchanged')", "(1, 'added')", "(2, 'unchanged')"]
@@ -0,0 +1,35 @@
+import XPathExpression as xpath
+
+def test_canonical_ignores_formatting():
+    assert xpath.canonical("${a} = 'yes' and ${b}>1") == xpath.canonical('(${a}="yes")  and (${b} > 1.0)')
+    assert xpath.canonical("${a} = 'yes' or ${b} > 1") != xpath.canonical("${a} = 'yes' and ${b} > 1")
+    assert xpath.canonical("a and (b and c)") == xpath.canonical("(a and b) and c")
+
+def test_canonical_passes_non_strings_and_unparsable_expressions():
+    assert xpath.canonical(None) is None
+    assert xpath.canonical("${a} = #") == xpath.canonical("${a}  =  #")
+
+def test_equal_sub_expressions_share_one_node():
+    node = xpath.parse("${a} = 'yes' or ${a} = 'yes'")
+    assert node[1] is node[2]
+    # Also across expressions
+    assert xpath.parse("${a}='yes' and ${b} > 1")[1] is node[1]
+
+def test_cache_is_bounded_and_can_be_cleared():
+    xpath.clear_cache()
+    for i in range(xpath.cache_size + 10):
+        xpath.canonical(f"${{q{i}}} > {i}")
+    info = xpath.cache_info()
+    assert info["expressions"].currsize == info["expressions"].maxsize == xpath.cache_size
+    assert 0 < info["nodes"] <= xpath.node_cache_size
+    xpath.clear_cache()
+    assert xpath.cache_info()["expressions"].currsize == 0 and xpath.cache_info()["nodes"] == 0
+
+def test_node_table_is_bounded(monkeypatch):
+    xpath.clear_cache()
+    monkeypatch.setattr(xpath, "node_cache_size", 50)
+    for i in range(100):
+        xpath.parse(f"${{q{i}}} > {i}")
+    assert xpath.cache_info()["nodes"] == 50
+    # Evicted nodes are built again with the same content
+    assert xpath.parse("${q0} > 0") == ("op", ">", ("ref", "q0"), ("num", 0.0))